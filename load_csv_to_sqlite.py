@@ -1,108 +1,152 @@
+import csv
 import os
-import pandas as pd
+import re
 import sqlite3
+from datetime import datetime
 from glob import glob
 
+from src.db import open_db
+
 DB_PATH = "nba_stats.db"
 DATA_FOLDER = os.path.abspath("data/player_logs")
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema")
+SCHEMA_PATH = os.path.join(SCHEMA_DIR, "player_game_logs.sql")
+INDEXES_PATH = os.path.join(SCHEMA_DIR, "indexes.sql")
+GAME_DATE_FORMAT = "%b %d, %Y"  # NBA API game dates, e.g. "Apr 08, 2025"
 
-conn = sqlite3.connect(DB_PATH)
+# open_db applies the bulk-load tuning: WAL, synchronous=NORMAL, in-memory
+# temp store, 64 MiB page cache and mmap
+conn = open_db(DB_PATH)
 cursor = conn.cursor()
 
 # Create table if not exists
-cursor.executescript("""
-CREATE TABLE IF NOT EXISTS player_game_logs (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    player_id INTEGER,
-    player_name TEXT,
-    season_id TEXT,
-    team_id INTEGER,
-    team_abbreviation TEXT,
-    team_name TEXT,
-    game_id TEXT,
-    game_date TEXT,
-    matchup TEXT,
-    wl TEXT,
-    min INTEGER,
-    pts INTEGER,
-    fgm INTEGER,
-    fga INTEGER,
-    fg_pct REAL,
-    fg3m INTEGER,
-    fg3a INTEGER,
-    fg3_pct REAL,
-    ftm INTEGER,
-    fta INTEGER,
-    ft_pct REAL,
-    oreb INTEGER,
-    dreb INTEGER,
-    reb INTEGER,
-    ast INTEGER,
-    stl INTEGER,
-    blk INTEGER,
-    tov INTEGER,
-    pf INTEGER,
-    plus_minus REAL
-);
-""")
+with open(SCHEMA_PATH, "r") as f:
+    cursor.executescript(f.read())
+conn.commit()
+
+# Column list never changes during the run, so build the INSERT once;
+# UNIQUE(player_id, game_id) makes re-importing a file a no-op
+expected_cols = [
+    col[1] for col in cursor.execute("PRAGMA table_info(player_game_logs);")
+    if col[1] != "id"
+]
+insert_sql = (
+    f"INSERT OR IGNORE INTO player_game_logs ({', '.join(expected_cols)}) "
+    f"VALUES ({', '.join('?' * len(expected_cols))})"
+)
+
+# Secondary indexes are dropped for the load and rebuilt once at the end:
+# one sort-build per index is far cheaper than updating them on every INSERT
+with open(INDEXES_PATH, "r") as f:
+    create_indexes_sql = f.read()
+for index_name in re.findall(r"CREATE INDEX IF NOT EXISTS (\w+)", create_indexes_sql):
+    cursor.execute(f"DROP INDEX IF EXISTS {index_name};")
 conn.commit()
 
 # Load all CSVs
 csv_files = sorted(glob(os.path.join(DATA_FOLDER, "*.csv")))
 print(f"Found {len(csv_files)} CSVs to import...")
 
-for file in csv_files:
-    df = pd.read_csv(file)
-
-    # Normalize column names
-    df.columns = [col.strip().upper() for col in df.columns]
-
-    # Skip empty
-    if df.empty:
-        continue
-
-    # Fix column names to match schema
-    df = df.rename(columns={
-        'PLAYER_NAME': 'player_name',
-        'PLAYER_ID': 'player_id',
-        'SEASON_ID': 'season_id',
-        'TEAM_ID': 'team_id',
-        'TEAM_ABBREVIATION': 'team_abbreviation',
-        'TEAM_NAME': 'team_name',
-        'GAME_ID': 'game_id',
-        'GAME_DATE': 'game_date',
-        'MATCHUP': 'matchup',
-        'WL': 'wl',
-        'MIN': 'min',
-        'PTS': 'pts',
-        'FGM': 'fgm',
-        'FGA': 'fga',
-        'FG_PCT': 'fg_pct',
-        'FG3M': 'fg3m',
-        'FG3A': 'fg3a',
-        'FG3_PCT': 'fg3_pct',
-        'FTM': 'ftm',
-        'FTA': 'fta',
-        'FT_PCT': 'ft_pct',
-        'OREB': 'oreb',
-        'DREB': 'dreb',
-        'REB': 'reb',
-        'AST': 'ast',
-        'STL': 'stl',
-        'BLK': 'blk',
-        'TOV': 'tov',
-        'PF': 'pf',
-        'PLUS_MINUS': 'plus_minus'
-    })
-
-    expected_cols = [col[1] for col in cursor.execute("PRAGMA table_info(player_game_logs);")]
-    df = df[[col for col in df.columns if col in expected_cols]]
 
+def iso_date(value):
+    """Store game_date as ISO like the pipeline writers; ISO and blank values pass through."""
+    if not value:
+        return None
     try:
-        df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-    except Exception as e:
-        print(f"❌ Error writing {file}: {e}")
+        return datetime.strptime(value, GAME_DATE_FORMAT).strftime("%Y-%m-%d")
+    except ValueError:
+        return value
+
+
+# The csv virtual-table import calls it from SQL for the game_date column
+conn.create_function("iso_date", 1, iso_date, deterministic=True)
+
+
+def load_csv_extension(conn):
+    """Try to load SQLite's csv virtual-table extension; False if unavailable."""
+    try:
+        conn.enable_load_extension(True)
+        conn.load_extension("csv")
+    except (AttributeError, sqlite3.OperationalError):
+        # AttributeError: this Python's sqlite3 was built without extension loading
+        return False
+    finally:
+        if hasattr(conn, "enable_load_extension"):
+            conn.enable_load_extension(False)
+    return True
+
+
+def read_header(path):
+    """Map each lowercased header name in one CSV to its original spelling and position."""
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), None)
+    return {col.strip().lower(): (col, i) for i, col in enumerate(header or [])}
+
+
+def import_with_csv_vtab(path):
+    """Import one CSV entirely inside SQLite through a temporary csv virtual table."""
+    header = read_header(path)
+    if not header:
+        return
+    # Blank cells and columns missing from the file become NULL
+    select_list = ", ".join(
+        ("iso_date(\"{}\")" if col == "game_date" else "NULLIF(\"{}\", '')").format(
+            header[col][0].replace('"', '""')
+        )
+        if col in header else "NULL"
+        for col in expected_cols
+    )
+    filename = path.replace("'", "''")
+    cursor.execute(f"CREATE VIRTUAL TABLE temp.csv_src USING csv(filename='{filename}', header=YES);")
+    try:
+        cursor.execute(
+            f"INSERT OR IGNORE INTO player_game_logs ({', '.join(expected_cols)}) "
+            f"SELECT {select_list} FROM temp.csv_src;"
+        )
+    finally:
+        cursor.execute("DROP TABLE temp.csv_src;")
+
+
+def read_rows(path):
+    """Stream one CSV as schema-ordered tuples without materializing it."""
+    header = read_header(path)
+    if not header:
+        return
+    # Map each schema column to its position in this file's header once
+    index = [header[col][1] if col in header else None for col in expected_cols]
+    date_pos = expected_cols.index("game_date")
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            # Blank cells and columns missing from the file become NULL
+            values = [row[i] or None if i is not None else None for i in index]
+            values[date_pos] = iso_date(values[date_pos])
+            yield tuple(values)
+
+
+# The csv extension keeps the whole per-row loop in SQLite's C core; without
+# it, fall back to streaming rows through executemany
+use_csv_vtab = load_csv_extension(conn)
+if use_csv_vtab:
+    print("⚡ Importing through SQLite's csv virtual table")
+
+# One transaction for every file: a single COMMIT (and fsync) at the end
+with conn:
+    for file in csv_files:
+        try:
+            if use_csv_vtab:
+                import_with_csv_vtab(file)
+            else:
+                # sqlite3 consumes the generator directly, so memory stays flat
+                cursor.executemany(insert_sql, read_rows(file))
+        except (sqlite3.Error, csv.Error) as e:
+            print(f"❌ Error writing {file}: {e}")
+
+print("📌 Rebuilding indexes...")
+cursor.executescript(create_indexes_sql)
+conn.commit()
 
 print("✅ All data imported successfully.")
 
-conn.close()
\ No newline at end of file
+conn.close()
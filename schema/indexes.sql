@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_game_date ON player_game_logs (game_date);
+CREATE INDEX IF NOT EXISTS idx_player_id ON player_game_logs (player_id);
+CREATE INDEX IF NOT EXISTS idx_season_player ON player_game_logs (season_id, player_id, player_name);
@@ -1,17 +1,25 @@
-import sqlite3
 import os
 
+from src.db import open_db
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DB_PATH = os.path.join(BASE_DIR, "nba_stats.db")
+INDEXES_PATH = os.path.join(BASE_DIR, "schema", "indexes.sql")
+
+# load_csv_to_sqlite.py drops and rebuilds these itself, so there is no need
+# to run this script before a bulk load (doing so only slows the inserts).
 
-conn = sqlite3.connect(DB_PATH)
+conn = open_db(DB_PATH)
 cursor = conn.cursor()
 
 print("📌 Adding indexes...")
 
-cursor.execute("CREATE INDEX IF NOT EXISTS idx_game_date ON player_game_logs (game_date);")
-cursor.execute("CREATE INDEX IF NOT EXISTS idx_player_id ON player_game_logs (player_id);")
-cursor.execute("CREATE INDEX IF NOT EXISTS idx_player_game ON player_game_logs (player_id, game_id);")
+with open(INDEXES_PATH, "r") as f:
+    cursor.executescript(f.read())
+
+# Superseded: duplicated the UNIQUE(player_id, game_id) autoindex, so every
+# insert maintained two identical B-trees
+cursor.execute("DROP INDEX IF EXISTS idx_player_game")
 
 conn.commit()
 conn.close()
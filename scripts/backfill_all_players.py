@@ -1,11 +1,14 @@
 import os
-import time
+import queue
+import threading
 import sqlite3
 import pandas as pd
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from nba_api.stats.static import players, teams
-from nba_api.stats.endpoints import playergamelog, commonteamroster
+from nba_api.stats.endpoints import playergamelog
+from src.data_pipeline import TeamRosterFetcher
+from src.db import open_db
 from src.logger import setup_logger
 import json
 
@@ -16,25 +19,36 @@ SCHEMA_PATH = os.path.join(BASE_DIR, "schema", "player_game_logs.sql")
 logger = setup_logger(debug=True)
 
 MAX_WORKERS = 5
+ROSTER_WORKERS = 6
 SEASON = "2024-25"
+GAME_DATE_FORMAT = "%b %d, %Y"  # NBA API game dates, e.g. "APR 13, 2025"
+BATCH_SIZE = 20   # players committed per transaction by the writer thread
+QUEUE_SIZE = 32   # fetched players buffered ahead of the writer
 
 # Step 1 — build team/player lookup
+def fetch_team_roster(team):
+    # Shares the pipeline's weekly on-disk roster cache and API rate limiter
+    df = TeamRosterFetcher.fetch_team_roster(team["id"])
+    if df is None:
+        logger.warning(f"❌ Failed to load roster for {team['full_name']}")
+    return team, df
+
 def build_player_team_lookup():
     team_map = {}
     logger.info("🔎 Building player → team map")
-    for team in teams.get_teams():
-        team_id = team["id"]
-        try:
-            df = commonteamroster.CommonTeamRoster(team_id=team_id).get_data_frames()[0]
-            for _, row in df.iterrows():
-                team_map[row["PLAYER_ID"]] = {
-                    "team_id": team_id,
-                    "team_abbreviation": team["abbreviation"],
-                    "team_name": team["full_name"]
-                }
-        except Exception as e:
-            logger.warning(f"❌ Failed to load roster for {team['full_name']}: {e}")
-        time.sleep(0.6)
+    with ThreadPoolExecutor(max_workers=ROSTER_WORKERS) as executor:
+        rosters = list(executor.map(fetch_team_roster, teams.get_teams()))
+
+    for team, df in rosters:
+        if df is None:
+            continue
+        # One read-only info dict per team, keyed by every player on its roster
+        team_info = {
+            "team_id": team["id"],
+            "team_abbreviation": team["abbreviation"],
+            "team_name": team["full_name"]
+        }
+        team_map.update(dict.fromkeys(df["PLAYER_ID"].tolist(), team_info))
     logger.info(f"✅ Loaded {len(team_map)} player-team entries")
     return team_map
 
@@ -42,89 +56,147 @@ def build_player_team_lookup():
 def ensure_table_exists(conn):
     with open(SCHEMA_PATH, "r") as f:
         create_sql = f.read()
-    conn.execute(create_sql)
+    conn.executescript(create_sql)
     conn.commit()
 
-# Step 3 — fetch existing keys
-def get_existing_keys(conn):
-    query = "SELECT player_id, game_id FROM player_game_logs"
-    df = pd.read_sql(query, conn)
-    return set(zip(df["player_id"], df["game_id"]))
+def get_schema_columns():
+    conn = open_db(DB_PATH)
+    ensure_table_exists(conn)
+    cols = [
+        row[1] for row in conn.execute("PRAGMA table_info(player_game_logs);")
+        if row[1] != "id"
+    ]
+    conn.close()
+    return cols
+
+def build_insert_sql(cols):
+    # UNIQUE(player_id, game_id) dedupes inside SQLite
+    return (
+        f"INSERT OR IGNORE INTO player_game_logs ({', '.join(cols)}) "
+        f"VALUES ({', '.join('?' * len(cols))})"
+    )
 
-# Step 4 — fetch and insert data for one player
-def fetch_and_insert_player(player, conn, existing_keys, team_map):
+# Step 3 — fetch one player's log as schema-ordered rows (runs in a worker process)
+def fetch_player(player, team_map, expected_cols):
     player_id = player["id"]
     player_name = player["full_name"]
 
+    df = playergamelog.PlayerGameLog(player_id=player_id, season=SEASON).get_data_frames()[0]
+    if df.empty:
+        return []
+
+    df.columns = df.columns.str.strip().str.lower()
+    df["player_id"] = player_id
+    df["player_name"] = player_name
+    df["game_date"] = pd.to_datetime(
+        df["game_date"], format=GAME_DATE_FORMAT, cache=True
+    ).dt.strftime("%Y-%m-%d")
+
+    # Add team info
+    team_info = team_map.get(player_id, {})
+    df["team_id"] = team_info.get("team_id")
+    df["team_abbreviation"] = team_info.get("team_abbreviation")
+    df["team_name"] = team_info.get("team_name")
+
+    # Align to the schema here so the writer thread only has to bind rows
+    df = df.reindex(columns=expected_cols, fill_value=None)
+    return list(df.itertuples(index=False, name=None))
+
+# Step 4 — single writer: owns the connection and commits BATCH_SIZE players at a time
+def write_batches(work_queue, results, insert_sql):
+    # Whatever goes wrong, keep draining the queue until the sentinel: the
+    # producer blocks on the bounded queue once nothing consumes it
     try:
-        df = playergamelog.PlayerGameLog(player_id=player_id, season=SEASON).get_data_frames()[0]
-
-        if df.empty:
-            return f"⚠️ No data for {player_name}"
-
-        df.columns = [col.lower() for col in df.columns]
-        df["player_id"] = player_id
-        df["player_name"] = player_name
-        df["game_date"] = pd.to_datetime(df["game_date"]).dt.date
-
-        # Add team info
-        team_info = team_map.get(player_id, {})
-        df["team_id"] = team_info.get("team_id")
-        df["team_abbreviation"] = team_info.get("team_abbreviation")
-        df["team_name"] = team_info.get("team_name")
-
-        # Re-align columns
-        expected_cols = [row[1] for row in conn.execute("PRAGMA table_info(player_game_logs);")]
-        df = df.reindex(columns=expected_cols, fill_value=None)
-
-        # Dedupe
-        df["key"] = list(zip(df["player_id"], df["game_id"]))
-        df = df[~df["key"].isin(existing_keys)]
-        df.drop(columns=["key"], inplace=True)
-
-        if not df.empty:
-            df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-            return f"✅ Inserted {len(df)} rows for {player_name}"
-        else:
-            return f"🟰 No new rows for {player_name}"
-
+        conn = open_db(DB_PATH)
     except Exception as e:
-        return f"❌ Failed for {player_name} — {e}"
-
-# Step 5 — threaded backfill runner
-def threaded_backfill():
-    logger.info("🚀 Starting full backfill with threading")
+        logger.error(f"❌ Writer could not open {DB_PATH}: {e}")
+        conn, open_error = None, e
+
+    batch = []
+    while True:
+        item = work_queue.get()
+        if item is not None:
+            batch.append(item)
+        if batch and (item is None or len(batch) >= BATCH_SIZE):
+            batch_results = []
+            try:
+                if conn is None:
+                    raise open_error
+                with conn:
+                    for player, rows in batch:
+                        inserted = conn.executemany(insert_sql, rows).rowcount
+                        if inserted:
+                            batch_results.append((player, f"✅ Inserted {inserted} rows for {player['full_name']}"))
+                        else:
+                            batch_results.append((player, f"🟰 No new rows for {player['full_name']}"))
+                results.extend(batch_results)
+            except Exception as e:
+                # The whole batch rolled back, so report every player in it
+                logger.error(f"❌ Batch of {len(batch)} players failed to write: {e}")
+                for player, _ in batch:
+                    results.append((player, f"❌ Failed for {player['full_name']} — {e}"))
+            batch = []
+        if item is None:
+            break
+
+    if conn is not None:
+        conn.close()
+
+# Step 5 — fetch/transform processes feeding the writer thread
+def parallel_backfill():
+    logger.info(f"🚀 Starting full backfill with {MAX_WORKERS} worker processes")
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    ensure_table_exists(conn)
-    existing_keys = get_existing_keys(conn)
     team_map = build_player_team_lookup()
     all_players = players.get_active_players()
 
-    insert_results = []
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(fetch_and_insert_player, p, conn, existing_keys, team_map)
-            for p in all_players
-        ]
+    # Resolve the schema once; workers and the writer share the result
+    expected_cols = get_schema_columns()
+    insert_sql = build_insert_sql(expected_cols)
 
-        for f in tqdm(as_completed(futures), total=len(futures), desc="📦 Backfilling"):
-            insert_results.append(f.result())
+    fetch_results = []
+    write_results = []
+    work_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    writer = threading.Thread(target=write_batches, args=(work_queue, write_results, insert_sql))
+    writer.start()
 
-    conn.close()
+    try:
+        # Processes, not threads: the pandas reshaping in fetch_player is CPU
+        # work that would otherwise serialize on the GIL
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(fetch_player, p, team_map, expected_cols): p
+                for p in all_players
+            }
+
+            for f in tqdm(as_completed(futures), total=len(futures), desc="📦 Backfilling"):
+                player = futures[f]
+                try:
+                    rows = f.result()
+                except Exception as e:
+                    fetch_results.append((player, f"❌ Failed for {player['full_name']} — {e}"))
+                    continue
+                if not rows:
+                    fetch_results.append((player, f"⚠️ No data for {player['full_name']}"))
+                    continue
+                work_queue.put((player, rows))
+    finally:
+        # Sentinel: flush the last partial batch and stop the writer
+        work_queue.put(None)
+        writer.join()
+
+    insert_results = fetch_results + write_results
 
     # Summary
-    inserted = [r for r in insert_results if r.startswith("✅")]
-    skipped = [r for r in insert_results if r.startswith("🟰")]
-    errors = [r for r in insert_results if r.startswith("❌")]
+    inserted = [msg for _, msg in insert_results if msg.startswith("✅")]
+    skipped = [msg for _, msg in insert_results if msg.startswith("🟰")]
+    errors = [msg for _, msg in insert_results if msg.startswith("❌")]
 
     logger.info(f"🎯 Inserted rows: {len(inserted)}")
     logger.info(f"🟰 Skipped (already exists): {len(skipped)}")
     logger.info(f"🔥 Errors: {len(errors)}")
 
     # Write failed players to JSON for retrying later
-    failed = [p for p, msg in zip(all_players, insert_results) if msg.startswith("❌")]
+    failed = [p for p, msg in insert_results if msg.startswith("❌")]
 
     with open("failed_players.json", "w") as f:
         json.dump(failed, f, indent=2)
@@ -135,4 +207,4 @@ def threaded_backfill():
         logger.warning(err)
 
 if __name__ == "__main__":
-    threaded_backfill()
+    parallel_backfill()
@@ -1,24 +1,34 @@
 import datetime
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
 from tqdm import tqdm
 from src.data_pipeline import DataPipeline
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(BASE_DIR)
 
+DATE_WORKERS = 4  # dates pulled concurrently; the NBA stats API tolerates small fan-out
+
 # Initialize the pipeline
 pipeline = DataPipeline()
 
 start_date = datetime.date(2024, 12, 1)
 end_date = datetime.date(2025, 5, 12)
 
-all_dates = [start_date + datetime.timedelta(days=i)
-             for i in range((end_date - start_date).days + 1)]
+all_dates = pd.date_range(start_date, end_date, freq="D").date
 
-for date in tqdm(all_dates, desc="📦 Backfilling stats"):
-    try:
-        result = pipeline.pull_stats_by_date(date, force=True)
-        print(f"✅ {date}: {result.total_rows_processed} rows processed, {result.total_rows_inserted} inserted")
-    except Exception as e:
-        print(f"❌ Failed on {date}: {e}")
+with ThreadPoolExecutor(max_workers=DATE_WORKERS) as executor:
+    futures = {
+        executor.submit(pipeline.pull_stats_by_date, date, force=True): date
+        for date in all_dates
+    }
+    for future in tqdm(as_completed(futures), total=len(futures), desc="📦 Backfilling stats"):
+        date = futures[future]
+        try:
+            result = future.result()
+            print(f"✅ {date}: {result.total_rows_processed} rows processed, {result.total_rows_inserted} inserted")
+        except Exception as e:
+            print(f"❌ Failed on {date}: {e}")
@@ -1,46 +1,47 @@
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup, Tag, Comment
+import lxml.html
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import time
 
 SEASON = 2024  # Change to desired season end year
 TEAM_LIST_URL = f"https://www.basketball-reference.com/leagues/NBA_{SEASON}.html"
 BASE_URL = "https://www.basketball-reference.com"
+REQUEST_TIMEOUT = 10
+
+# One keep-alive session for all 31 page loads instead of a new TLS handshake each
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
 
 # Get all team abbreviations for the season
-resp = requests.get(TEAM_LIST_URL)
-soup = BeautifulSoup(resp.text, "lxml")
+resp = session.get(TEAM_LIST_URL, timeout=REQUEST_TIMEOUT)
 
 # Find the 'per_game-team' table, including inside comments
-def get_per_game_team_table(soup):
-    table = soup.find("table", {"id": "per_game-team"})
-    if table:
-        return table
-    # Search inside comments
-    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-        if not isinstance(comment, str):
-            continue
-        comment_soup = BeautifulSoup(comment, "lxml")
-        table = comment_soup.find("table", {"id": "per_game-team"})
-        if table:
-            return table
-    return None
+def get_per_game_team_table(html):
+    tree = lxml.html.fromstring(html)
+    tables = tree.xpath("//table[@id='per_game-team']")
+    if tables:
+        return tables[0]
+    # BR hides most tables in HTML comments: join them and parse once
+    commented = "".join(comment.text or "" for comment in tree.xpath("//comment()"))
+    if not commented.strip():
+        return None
+    fragment = lxml.html.fragment_fromstring(commented, create_parent="div")
+    tables = fragment.xpath(".//table[@id='per_game-team']")
+    return tables[0] if tables else None
 
-team_table = get_per_game_team_table(soup)
+team_table = get_per_game_team_table(resp.text)
 team_abbrs = []
-if isinstance(team_table, Tag):
-    for row in team_table.find_all("tr"):
-        if not isinstance(row, Tag):
-            continue
-        th = row.find("th", {"data-stat": "team_name"})
-        if th and isinstance(th, Tag) and th.a and isinstance(th.a, Tag):
-            href = th.a.get("href", "")
-            if not isinstance(href, str):
-                href = str(href)
-            parts = href.split("/")
-            abbr = parts[2] if len(parts) > 2 else None
-            if abbr:
-                team_abbrs.append(abbr)
+if team_table is not None:
+    for href in team_table.xpath(".//th[@data-stat='team_name']/a/@href"):
+        parts = href.split("/")
+        abbr = parts[2] if len(parts) > 2 else None
+        if abbr:
+            team_abbrs.append(abbr)
 else:
     print("Could not find per_game-team table!")
     exit(1)
@@ -52,25 +53,18 @@ player_list = []
 for abbr in team_abbrs:
     url = f"{BASE_URL}/teams/{abbr}/{SEASON}.html"
     print(f"Scraping roster: {url}")
-    resp = requests.get(url)
+    resp = session.get(url, timeout=REQUEST_TIMEOUT)
     soup = BeautifulSoup(resp.text, "lxml")
-    roster_table = soup.find("table", {"id": "roster"})
-    if not isinstance(roster_table, Tag):
+    player_links = soup.select("table#roster th[data-stat=player] a[href]")
+    if not player_links:
         print(f"No roster table for {abbr}")
         continue
-    for row in roster_table.find_all("tr"):
-        if not isinstance(row, Tag):
-            continue
-        th = row.find("th", {"data-stat": "player"})
-        if th and isinstance(th, Tag) and th.a and isinstance(th.a, Tag):
-            name = th.text.strip()
-            href = th.a.get("href", "")
-            if not isinstance(href, str):
-                href = str(href)
-            br_id = href.split("/")[-1].replace(".html", "") if href else None
-            if br_id and br_id not in player_set:
-                player_set.add(br_id)
-                player_list.append({"player_id": br_id, "player_name": name})
+    for link in player_links:
+        name = link.get_text(strip=True)
+        br_id = link["href"].rsplit("/", 1)[-1].removesuffix(".html")
+        if br_id and br_id not in player_set:
+            player_set.add(br_id)
+            player_list.append({"player_id": br_id, "player_name": name})
     time.sleep(0.5)  # Be polite to the server
 
 # Save as CSV
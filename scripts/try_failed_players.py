@@ -1,10 +1,11 @@
 import os
 import time
 import json
-import sqlite3
 import pandas as pd
 from tqdm import tqdm
 from nba_api.stats.endpoints import playergamelog
+from src import nba_utils
+from src.db import open_db
 from src.logger import setup_logger
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -12,22 +13,16 @@ DB_PATH = os.path.join(BASE_DIR, "nba_stats.db")
 SCHEMA_PATH = os.path.join(BASE_DIR, "schema", "player_game_logs.sql")
 FAILED_FILE = os.path.join(BASE_DIR, "failed_players.json")
 SEASON = "2024-25"
-BATCH_PAUSE = 10  # seconds to pause between batches
-BATCH_SIZE = 20   # how many players to hit before pausing
+GAME_DATE_FORMAT = "%b %d, %Y"  # NBA API game dates, e.g. "APR 13, 2025"
 
 logger = setup_logger(debug=True)
 
 def ensure_table_exists(conn):
     with open(SCHEMA_PATH, "r") as f:
         create_sql = f.read()
-    conn.execute(create_sql)
+    conn.executescript(create_sql)
     conn.commit()
 
-def get_existing_keys(conn):
-    query = "SELECT player_id, game_id FROM player_game_logs"
-    df = pd.read_sql(query, conn)
-    return set(zip(df["player_id"], df["game_id"]))
-
 def retry_with_backoff(fn, retries=3, base_delay=1.0):
     for i in range(retries):
         try:
@@ -38,28 +33,37 @@ def retry_with_backoff(fn, retries=3, base_delay=1.0):
             time.sleep(wait)
     raise Exception("All retries failed.")
 
-def fetch_and_insert(conn, player, existing_keys):
+def fetch_and_insert(conn, player, expected_cols, insert_sql):
     player_id = player["id"]
     player_name = player["full_name"]
 
     try:
-        df = retry_with_backoff(lambda: playergamelog.PlayerGameLog(player_id=player_id, season=SEASON).get_data_frames()[0])
+        def fetch():
+            # Same limiter as the pipeline: only sleeps when calls come too fast
+            nba_utils.stats_rate_limiter.wait()
+            return playergamelog.PlayerGameLog(player_id=player_id, season=SEASON).get_data_frames()[0]
+
+        df = retry_with_backoff(fetch)
         if df.empty:
             return f"⚠️ No data for {player_name}", False
 
-        df.columns = [col.lower() for col in df.columns]
+        df.columns = df.columns.str.strip().str.lower()
         df["player_id"] = player_id
         df["player_name"] = player_name
-        df["game_date"] = pd.to_datetime(df["game_date"]).dt.date
-
-        # Remove existing keys
-        df["key"] = list(zip(df["player_id"], df["game_id"]))
-        df = df[~df["key"].isin(existing_keys)]
-        df.drop(columns=["key"], inplace=True)
-
-        if not df.empty:
-            df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-            return f"✅ Inserted {len(df)} rows for {player_name}", True
+        # ISO text, matching what the other pipelines store
+        df["game_date"] = pd.to_datetime(
+            df["game_date"], format=GAME_DATE_FORMAT, cache=True
+        ).dt.strftime("%Y-%m-%d")
+
+        # Align to the schema; UNIQUE(player_id, game_id) skips existing rows
+        df = df.reindex(columns=expected_cols, fill_value=None)
+        with conn:
+            inserted = conn.executemany(
+                insert_sql, df.itertuples(index=False, name=None)
+            ).rowcount
+
+        if inserted:
+            return f"✅ Inserted {inserted} rows for {player_name}", True
         else:
             return f"🟰 No new rows for {player_name}", True
 
@@ -76,15 +80,24 @@ if __name__ == "__main__":
     with open(FAILED_FILE, "r") as f:
         retry_players = json.load(f)
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = open_db(DB_PATH)
     ensure_table_exists(conn)
-    existing_keys = get_existing_keys(conn)
+
+    # The schema doesn't change mid-run: resolve columns and the INSERT once
+    expected_cols = [
+        row[1] for row in conn.execute("PRAGMA table_info(player_game_logs);")
+        if row[1] != "id"
+    ]
+    insert_sql = (
+        f"INSERT OR IGNORE INTO player_game_logs ({', '.join(expected_cols)}) "
+        f"VALUES ({', '.join('?' * len(expected_cols))})"
+    )
 
     still_failed = []
     total_success = 0
 
-    for i, player in enumerate(tqdm(retry_players, desc="♻️ Retrying")):
-        msg, success = fetch_and_insert(conn, player, existing_keys)
+    for player in tqdm(retry_players, desc="♻️ Retrying"):
+        msg, success = fetch_and_insert(conn, player, expected_cols, insert_sql)
         logger.info(msg)
 
         if not success:
@@ -92,11 +105,6 @@ if __name__ == "__main__":
         else:
             total_success += 1
 
-        # Optional pause between batches
-        if (i + 1) % BATCH_SIZE == 0:
-            logger.info(f"🛑 Pausing for {BATCH_PAUSE}s to avoid rate-limiting...")
-            time.sleep(BATCH_PAUSE)
-
     conn.close()
 
     logger.info(f"🎉 Retry complete. Total successful: {total_success}, Remaining failures: {len(still_failed)}")
@@ -4,8 +4,10 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import sqlite3
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.colors import qualitative
 import streamlit as st
 
 from src.player_insights import generate_prop_summary_table
@@ -14,13 +16,64 @@ st.set_page_config(page_title="NBA Betting Dashboard", layout="wide")
 st.title("🏀 NBA Player Stats Dashboard")
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "nba_stats.db")
-conn = sqlite3.connect(DB_PATH)
-df = pd.read_sql_query("SELECT * FROM player_game_logs", conn)
-conn.close()
-total_players = df["player_id"].nunique()
+# Only the columns the dashboard reads; the other 25 box-score columns stay in SQLite
+LOG_COLUMNS = ["player_id", "player_name", "game_date", "pts", "reb", "ast"]
+
+
+def db_mtime(db_path):
+    # In WAL mode writes land in the -wal file first, so check both
+    paths = [db_path, db_path + "-wal"]
+    return max(os.path.getmtime(p) for p in paths if os.path.exists(p))
+
+
+@st.cache_resource
+def get_conn(db_path):
+    """One connection per process, kept warm across reruns."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_logs(db_path, mtime):
+    """Load every game log with dates parsed; mtime only keys the cache."""
+    return pd.read_sql_query(
+        f"SELECT {', '.join(LOG_COLUMNS)} FROM player_game_logs ORDER BY game_date",
+        get_conn(db_path),
+        # The pipeline stores ISO dates, so skip per-row format inference
+        parse_dates={"game_date": "%Y-%m-%d"},
+        # Repeated names as integer codes: cheaper groupby/isin and less memory
+        dtype={"player_name": "category"},
+    )
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_prop_summary(_df, mtime, props, include_stats):
+    """Prop hit table; recomputed only when the data or the prop inputs change."""
+    return generate_prop_summary_table(_df, props=props, include_stats=include_stats)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_top_scorers(_df, mtime, game_limit):
+    """Top 5 by average points over each player's last `game_limit` games."""
+    # Rows are date-ordered, so tail() is each player's most recent games
+    return (
+        _df.groupby("player_name", observed=True)
+        .tail(game_limit)
+        .groupby("player_name", observed=True)["pts"]
+        .mean()
+        .nlargest(5)
+        .reset_index()
+        .rename(columns={"pts": "Avg Points"})
+    )
+
 
-# Normalize dates
-df["game_date"] = pd.to_datetime(df["game_date"])
+data_mtime = db_mtime(DB_PATH)
+df = load_logs(DB_PATH, data_mtime)
+total_players = df["player_id"].nunique()
+# Rows come back date-ordered, so each player's positions are already chronological
+idx_by_player = df.groupby("player_name", observed=True).indices
 
 # Sidebar controls
 st.sidebar.markdown("### 🎯 Player & Chart Controls")
@@ -31,16 +84,7 @@ game_limit = st.sidebar.slider(
 )
 
 # 🌟 Top 5 scorers by average points over recent games
-recent_df = (
-    df.sort_values("game_date", ascending=False).groupby("player_name").head(game_limit)
-)
-top_players = (
-    recent_df.groupby("player_name")["pts"]
-    .mean()
-    .sort_values(ascending=False)
-    .head(5)
-    .index.tolist()
-)
+top_5_df = get_top_scorers(df, data_mtime, game_limit)
 
 # --- Sidebar player selection ---
 all_players = sorted(df["player_name"].dropna().unique())
@@ -51,14 +95,6 @@ selected_players = st.sidebar.multiselect(
 # 🧱 Display jumbotron section if no players are manually selected
 if not selected_players:
     st.markdown(f"## 🌟 Top 5 Scorers (Last {game_limit} Games)")
-    top_5_df = (
-        recent_df.groupby("player_name")["pts"]
-        .mean()
-        .sort_values(ascending=False)
-        .head(5)
-        .reset_index()
-        .rename(columns={"pts": "Avg Points"})
-    )
     st.dataframe(
         top_5_df.style.format({"Avg Points": "{:.1f}"}), use_container_width=True
     )
@@ -84,8 +120,8 @@ show_stats = st.sidebar.multiselect(
 )
 
 try:
-    prop_summary_df = generate_prop_summary_table(
-        df, props=custom_props, include_stats=["pts"] + show_stats
+    prop_summary_df = get_prop_summary(
+        df, data_mtime, custom_props, ["pts"] + show_stats
     )
 
     if selected_players:
@@ -99,81 +135,108 @@ try:
 except Exception as e:
     st.error(f"⚠️ Failed to generate prop summary table: {e}")
 
-
-st.sidebar.markdown("### 📊 Stats to Plot")
-stats = ["pts", "reb", "ast"]
-selected_stats = []
-for stat in stats:
-    col1, col2 = st.sidebar.columns([1, 1])
-    with col1:
-        show_raw = st.checkbox(f"{stat} (raw)", value=True, key=f"{stat}_raw")
-    with col2:
-        show_avg = st.checkbox(f"{stat} (avg)", value=True, key=f"{stat}_avg")
-    if show_raw:
-        selected_stats.append((stat, "raw"))
-    if show_avg:
-        selected_stats.append((stat, "avg"))
-
 # Player insights display
 st.sidebar.markdown(f"**Players loaded:** `{len(selected_players)}`")
 st.sidebar.markdown(f"### 📋 Total unique players in DB: `{total_players}`")
 
+stats = ["pts", "reb", "ast"]
+
+
+@st.fragment
+def render_trendlines(player_groups, plotted):
+    """Stat checkboxes plus the combined chart; toggling a stat reruns only this."""
+    st.markdown("#### 📊 Stats to Plot")
+    selected_stats = []
+    toggle_cols = st.columns(len(stats) * 2)
+    for i, stat in enumerate(stats):
+        with toggle_cols[2 * i]:
+            show_raw = st.checkbox(f"{stat} (raw)", value=True, key=f"{stat}_raw")
+        with toggle_cols[2 * i + 1]:
+            show_avg = st.checkbox(f"{stat} (avg)", value=True, key=f"{stat}_avg")
+        if show_raw:
+            selected_stats.append((stat, "raw"))
+        if show_avg:
+            selected_stats.append((stat, "avg"))
+
+    # One trace per player and stat/mode, so each line can take its player's
+    # colour (plotly.js can't colour one line by segment); a player's traces
+    # share a legend group. Stats are told apart by marker symbol, the
+    # rolling average by a dashed line.
+    palette = qualitative.Plotly
+    symbols = ["circle", "square", "diamond", "triangle-up", "x", "cross"]
+    stat_symbols = {stat: symbols[i % len(symbols)] for i, stat in enumerate(stats)}
+    fig = go.Figure()
+    for i, player in enumerate(plotted):
+        player_data = player_groups[player]
+        color = palette[i % len(palette)]
+        for stat, mode in selected_stats:
+            raw = mode == "raw"
+            values = player_data[stat if raw else f"{stat}_avg"]
+            fig.add_trace(
+                go.Scattergl(
+                    x=player_data["game_date"],
+                    y=values,
+                    mode="lines+markers" if raw else "lines",
+                    name=f"{player} · {stat}" + ("" if raw else " (3-game avg)"),
+                    legendgroup=player,
+                    line=dict(color=color, dash="solid" if raw else "dash"),
+                    marker=dict(color=color, symbol=stat_symbols[stat]),
+                    hovertemplate=f"{player}<br>%{{x|%b %d}}: %{{y}}<extra></extra>",
+                )
+            )
+    fig.update_layout(
+        height=500,
+        margin=dict(t=10, b=40),
+        legend=dict(orientation="h"),
+        xaxis_title="Game Date",
+        yaxis_title="Stat Value",
+        template="plotly_dark",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
 # Plot trendlines
 if selected_players:
     st.subheader(f"📈 Stat Trendlines (Last {game_limit} Games + 3-Game Rolling Avg)")
+    recent_rows = [
+        idx_by_player[player][-game_limit:]
+        for player in selected_players
+        if player in idx_by_player
+    ]
+    recent_games = df.take(np.concatenate(recent_rows)) if recent_rows else df.iloc[:0]
+    # 3-game rolling means for every player in one grouped pass
+    recent_games[[f"{stat}_avg" for stat in stats]] = (
+        recent_games.groupby("player_name", observed=True)[stats]
+        .rolling(3, min_periods=1)
+        .mean()
+        .reset_index(level=0, drop=True)
+    )
+    player_groups = dict(
+        tuple(recent_games.groupby("player_name", observed=True, sort=False))
+    )
+
+    plotted = []
     for player in selected_players:
-        player_data = (
-            df[df["player_name"] == player]
-            .sort_values("game_date", ascending=False)
-            .head(game_limit)
-        )
-        player_data = player_data.sort_values("game_date")
-        if player_data.empty:
+        if player not in player_groups:
             st.write(f"⚠️ No data available for {player}")
             continue
-        fig = go.Figure()
-        for stat, mode in selected_stats:
-            if mode == "raw":
-                fig.add_trace(
-                    go.Scatter(
-                        x=player_data["game_date"],
-                        y=player_data[stat],
-                        mode="lines+markers",
-                        name=stat,
-                    )
-                )
-            elif mode == "avg":
-                fig.add_trace(
-                    go.Scatter(
-                        x=player_data["game_date"],
-                        y=player_data[stat].rolling(3, min_periods=1).mean(),
-                        mode="lines",
-                        name=f"{stat} (3-game avg)",
-                        line=dict(dash="dash"),
-                    )
-                )
-        player_id = df[df["player_name"] == player]["player_id"].iloc[0]
+        plotted.append(player)
+        player_id = player_groups[player]["player_id"].iloc[0]
         img_url = f"https://cdn.nba.com/headshots/nba/latest/1040x760/{player_id}.png"
+        season_stats = (
+            df.take(idx_by_player[player])[["pts", "reb", "ast"]].mean().round(1)
+        )
         left, right = st.columns([1, 6])
         with left:
             st.image(img_url, width=160, caption=player)
         with right:
             st.markdown(f"### {player}")
-            fig.update_layout(
-                height=500,
-                margin=dict(t=10, b=40),
-                legend=dict(orientation="h"),
-                xaxis_title="Game Date",
-                yaxis_title="Stat Value",
-                template="plotly_dark",
+            st.markdown(
+                f"**Season Averages:**  \n"
+                f"PTS: `{season_stats['pts']}` | "
+                f"REB: `{season_stats['reb']}` | "
+                f"AST: `{season_stats['ast']}`"
             )
-            st.plotly_chart(fig, use_container_width=True)
-        season_stats = (
-            df[df["player_name"] == player][["pts", "reb", "ast"]].mean().round(1)
-        )
-        st.markdown(
-            f"**Season Averages:**  \n"
-            f"PTS: `{season_stats['pts']}` | "
-            f"REB: `{season_stats['reb']}` | "
-            f"AST: `{season_stats['ast']}`"
-        )
+
+    if plotted:
+        render_trendlines(player_groups, plotted)
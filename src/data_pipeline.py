@@ -1,28 +1,44 @@
+import contextlib
 import datetime
+import glob
 import os
+import re
 import sqlite3
+import threading
+import unicodedata
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Dict, Any
+from itertools import chain
+from typing import List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from nba_api.stats.endpoints import commonteamroster
 
 from src import nba_utils
 from src.logger import setup_logger
-from src.improved_nba_fetcher import BasketballReferenceFetcher
+from src.improved_nba_fetcher import BR_WORKERS, BasketballReferenceFetcher
+from src.data_pipeline_br import BRDataPipeline, drop_stored_games
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 OUTPUT_DIR = os.path.join(BASE_DIR, "data", "player_logs")
+ROSTER_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache")
 DB_PATH = os.path.join(BASE_DIR, "nba_stats.db")
 SCHEMA_PATH = os.path.join(BASE_DIR, "schema", "player_game_logs.sql")
+INDEXES_PATH = os.path.join(BASE_DIR, "schema", "indexes.sql")
+# Verified Basketball Reference IDs written by scripts/generate_br_player_list.py
+BR_PLAYER_LIST_GLOB = os.path.join(BASE_DIR, "br_player_list_*.csv")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(ROSTER_CACHE_DIR, exist_ok=True)
 
 logger = setup_logger(debug=True)
 TEAM_ID_MAP = nba_utils.get_team_ids()
 
 MAX_WORKERS = 5
+# Bound parameters per statement on older SQLite builds (SQLITE_MAX_VARIABLE_NUMBER)
+SQLITE_MAX_VARIABLES = 999
 
 
 @dataclass
@@ -30,7 +46,6 @@ class ProcessingResult:
     """Container for processing results and statistics."""
     successful_players: List[Tuple[str, int]]
     failed_players: List[Tuple[str, int]]
-    all_stats: List[pd.DataFrame]
     total_rows_processed: int
     total_rows_inserted: int
 
@@ -40,68 +55,147 @@ class DatabaseManager:
     
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
+        self.conn: Optional[sqlite3.Connection] = None
+        self._col_order: Tuple[str, ...] = ()
+        self._rows_per_statement = 1
+        self._insert_sql = ""
+        self._insert_one_sql = ""
+        self._write_lock = threading.Lock()
+        # Separate from _write_lock: insert_data() calls setup_database()
+        # before taking it, and threads may race to open the connection
+        self._init_lock = threading.Lock()
     
     def setup_database(self) -> sqlite3.Connection:
-        """Initialize database connection and create table if needed."""
-        conn = sqlite3.connect(self.db_path)
+        """Open the shared connection and create the table on first use."""
+        if self.conn is not None:
+            return self.conn
+        with self._init_lock:
+            if self.conn is None:
+                self._open_connection()
+        return self.conn
+    
+    def _open_connection(self) -> None:
+        # One connection for the manager's lifetime; writes are serialized by
+        # _write_lock, so it can be handed between threads. Autocommit mode:
+        # insert_data() issues BEGIN/COMMIT itself.
+        conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False
+        )
         cursor = conn.cursor()
         
         # Performance optimizations
         cursor.execute("PRAGMA synchronous = OFF;")
         cursor.execute("PRAGMA journal_mode = WAL;")
         cursor.execute("PRAGMA foreign_keys = ON;")
+        cursor.execute("PRAGMA temp_store = MEMORY;")
+        cursor.execute("PRAGMA cache_size = -65536;")  # 64 MiB page cache
+        cursor.execute("PRAGMA mmap_size = 268435456;")  # 256 MiB memory-mapped reads
+        cursor.execute("PRAGMA busy_timeout = 5000;")
+        cursor.execute("PRAGMA wal_autocheckpoint = 10000;")  # don't checkpoint mid-batch
         
         # Create table if it doesn't exist
         with open(SCHEMA_PATH, "r") as f:
             create_table_sql = f.read()
-        cursor.execute(create_table_sql)
-        conn.commit()
+        cursor.executescript(create_table_sql)
         
-        return conn
-    
-    def get_existing_keys(self, conn: sqlite3.Connection) -> set:
-        """Get existing player_id, game_id combinations to prevent duplicates."""
-        existing_keys = pd.read_sql_query(
-            "SELECT player_id, game_id FROM player_game_logs", conn
+        # The schema is fixed for the life of the manager: resolve the column
+        # order and both INSERT statements once (id is left to AUTOINCREMENT)
+        self._col_order = tuple(
+            col[1] for col in conn.execute("PRAGMA table_info(player_game_logs);")
+            if col[1] != "id"
         )
-        return set(zip(existing_keys["player_id"], existing_keys["game_id"]))
+        self._rows_per_statement = max(1, SQLITE_MAX_VARIABLES // len(self._col_order))
+        self._insert_sql = _insert_or_ignore_sql(self._col_order, self._rows_per_statement)
+        self._insert_one_sql = _insert_or_ignore_sql(self._col_order, 1)
+        
+        # Published last, so other threads never see a half-initialized manager
+        self.conn = conn
+    
+    def close(self) -> None:
+        """Close the shared connection; the next setup_database() reopens it."""
+        with self._init_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
     
-    def insert_data(self, df: pd.DataFrame, conn: sqlite3.Connection) -> int:
-        """Insert data into database, returning number of rows inserted."""
+    def insert_data(self, df: pd.DataFrame, bulk_load: bool = False) -> int:
+        """Insert data into database, returning number of rows inserted.
+
+        With bulk_load=True the secondary indexes from schema/indexes.sql are
+        dropped for the insert and rebuilt once afterwards, which is cheaper for
+        large backfills. The (player_id, game_id) unique index always stays,
+        since INSERT OR IGNORE relies on it.
+        """
         if df.empty:
             return 0
         
-        # Get expected columns from database schema
-        expected_cols = [
-            col[1] for col in conn.cursor().execute("PRAGMA table_info(player_game_logs);")
-        ]
-        
-        # Filter DataFrame to only include expected columns
-        actual_cols = df.columns.tolist()
-        filtered_df = df[[col for col in actual_cols if col in expected_cols]]
+        conn = self.setup_database()
         
-        if filtered_df.empty:
+        if not df.columns.isin(self._col_order).any():
             logger.error("DataFrame is empty after filtering columns")
             return 0
         
-        # Remove duplicates
-        existing_keys = self.get_existing_keys(conn)
-        before_count = len(filtered_df)
-        
-        # Create key tuples for deduplication
-        key_tuples = list(zip(filtered_df["player_id"], filtered_df["game_id"]))
-        mask = ~pd.Series(key_tuples).isin(existing_keys)
-        filtered_df = filtered_df[mask]
-        
-        after_count = len(filtered_df)
-        logger.info(f"Removed {before_count - after_count} duplicate rows")
-        
-        if not filtered_df.empty:
-            filtered_df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-            conn.commit()
-            return len(filtered_df)
+        # Align to the schema order the prepared INSERTs expect; columns the
+        # frame doesn't have are bound as NULL. Skip the copy if already aligned.
+        if tuple(df.columns) == self._col_order:
+            aligned = df
+        else:
+            aligned = df.reindex(columns=list(self._col_order))
         
-        return 0
+        # Rows with a game_id are deduped by the UNIQUE(player_id, game_id)
+        # index, so their existing keys never have to be pulled into Python;
+        # BR fallback rows have none and are checked by date inside the
+        # transaction. The whole batch is written in one write transaction.
+        secondary_indexes = self._secondary_indexes() if bulk_load else []
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = list(drop_stored_games(aligned, conn).itertuples(index=False, name=None))
+                for index_name, _ in secondary_indexes:
+                    conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+                inserted = self._chunked_insert(conn, rows)
+                for _, create_sql in secondary_indexes:
+                    conn.execute(create_sql)
+                conn.execute("COMMIT")
+            except BaseException:
+                # Anything that escapes mid-batch (bad binding, interrupt) must
+                # not leave the shared connection inside an open transaction
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Removed {len(aligned) - inserted} duplicate rows")
+        return inserted
+    
+    @staticmethod
+    def _secondary_indexes() -> List[Tuple[str, str]]:
+        """(name, CREATE statement) for each index in schema/indexes.sql."""
+        with open(INDEXES_PATH, "r") as f:
+            statements = [stmt.strip() for stmt in f.read().split(";") if stmt.strip()]
+        return [
+            (re.search(r"CREATE INDEX IF NOT EXISTS (\w+)", stmt).group(1), stmt)
+            for stmt in statements
+        ]
+    
+    def _chunked_insert(self, conn: sqlite3.Connection, rows: List[tuple]) -> int:
+        """INSERT OR IGNORE with as many rows per statement as SQLite allows."""
+        step = self._rows_per_statement
+        full = len(rows) - len(rows) % step
+
+        inserted = 0
+        if full:
+            params = (
+                tuple(chain.from_iterable(rows[i:i + step]))
+                for i in range(0, full, step)
+            )
+            inserted += conn.executemany(self._insert_sql, params).rowcount
+        if full < len(rows):
+            inserted += conn.executemany(self._insert_one_sql, rows[full:]).rowcount
+        return inserted
+
+
+def _insert_or_ignore_sql(columns: Tuple[str, ...], rows: int) -> str:
+    row = f"({', '.join('?' * len(columns))})"
+    values = ", ".join([row] * rows)
+    return f"INSERT OR IGNORE INTO player_game_logs ({', '.join(columns)}) VALUES {values}"
 
 
 class DataProcessor:
@@ -114,7 +208,28 @@ class DataProcessor:
             return df
         
         # Convert column names to lowercase
-        df.columns = [col.lower() for col in df.columns]
+        df.columns = df.columns.str.lower()
+
+        # Store ISO dates so readers can parse with a fixed format. NBA API rows
+        # ("APR 13, 2025") and Basketball Reference rows can share one frame.
+        if "game_date" in df.columns:
+            df["game_date"] = pd.to_datetime(
+                df["game_date"], format="mixed"
+            ).dt.strftime("%Y-%m-%d")
+        return df
+    
+    @staticmethod
+    def drop_duplicate_games(df: pd.DataFrame) -> pd.DataFrame:
+        """Drop repeated (player_id, game_id) rows, e.g. a traded player on two rosters."""
+        if not {"player_id", "game_id"}.issubset(df.columns):
+            return df
+        
+        # Rows without a game_id (BR fallback) can't be matched, so keep them all
+        dupes = df.duplicated(subset=["player_id", "game_id"], keep="last")
+        dupes &= df["game_id"].notna()
+        if dupes.any():
+            logger.info(f"Dropped {int(dupes.sum())} duplicate player/game rows")
+            df = df[~dupes]
         return df
     
     @staticmethod
@@ -128,7 +243,7 @@ class DataProcessor:
             logger.debug(f"No PTS column for {player_name}")
             return False
         
-        if bool(player_stats["PTS"].isnull().all()):
+        if not player_stats["PTS"].notna().any():
             logger.debug(f"No valid scoring data for {player_name}")
             return False
         
@@ -139,21 +254,42 @@ class PlayerStatsFetcher:
     """Handles fetching player statistics."""
     
     def __init__(self):
-        self.successful_players: List[Tuple[str, int]] = []
-        self.failed_players: List[Tuple[str, int]] = []
         self.br_fetcher = BasketballReferenceFetcher()
+        self._br_ids = self._load_br_ids()
+    
+    @staticmethod
+    def _name_key(player_name: str) -> str:
+        # BR spells names with diacritics ("Jokić"); the NBA API mostly doesn't
+        decomposed = unicodedata.normalize("NFKD", player_name)
+        return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+    
+    @staticmethod
+    def _load_br_ids() -> dict:
+        """Map normalized player name -> verified Basketball Reference ID."""
+        br_ids = {}
+        # Files sort by season, so newer lists overwrite older entries
+        for path in sorted(glob.glob(BR_PLAYER_LIST_GLOB)):
+            try:
+                players = pd.read_csv(path, dtype=str).dropna()
+            except pd.errors.EmptyDataError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read {path}: {e}")
+                continue
+            br_ids.update(
+                zip(map(PlayerStatsFetcher._name_key, players["player_name"]), players["player_id"])
+            )
+        return br_ids
     
     def fetch_player_stats(
         self, 
-        player: Dict[str, Any], 
+        player_name: str, 
+        player_id: int, 
         team_id: int, 
         team_abbreviation: str, 
         team_name: str
     ) -> Optional[pd.DataFrame]:
-        """Fetch statistics for a single player."""
-        player_name = player["PLAYER"]
-        player_id = player["PLAYER_ID"]
-        
+        """Fetch statistics for a single player; None means the fetch failed."""
         logger.debug(f"Fetching recent games for {player_name} (ID: {player_id})")
         
         try:
@@ -177,11 +313,9 @@ class PlayerStatsFetcher:
                             br_stats['TEAM_ID'] = team_id
                             br_stats['TEAM_ABBREVIATION'] = team_abbreviation
                             br_stats['TEAM_NAME'] = team_name
-                            self.successful_players.append((player_name, player_id))
                             return br_stats
                     except Exception as e:
                         logger.warning(f"Basketball Reference fallback failed for {player_name}: {e}")
-                self.failed_players.append((player_name, player_id))
                 return None
             
             # Add team information
@@ -191,15 +325,16 @@ class PlayerStatsFetcher:
             player_stats["PLAYER_NAME"] = player_name
             
             logger.debug(f"Retrieved {len(player_stats)} rows for {player_name}")
-            self.successful_players.append((player_name, player_id))
             return player_stats
             
         except Exception as e:
             logger.warning(f"Failed for {player_name} (ID: {player_id}) — error: {e}")
-            self.failed_players.append((player_name, player_id))
             return None
     
     def _guess_br_id(self, player_name: str) -> Optional[str]:
+        br_id = self._br_ids.get(self._name_key(player_name))
+        if br_id:
+            return br_id
         # Simple heuristic: last name + first 2 letters of first name + 2 digit number (e.g., jamesle01)
         # This is not perfect, but works for many star players
         parts = player_name.lower().split()
@@ -212,21 +347,38 @@ class PlayerStatsFetcher:
 class TeamRosterFetcher:
     """Handles fetching team rosters."""
     
+    @staticmethod
+    def _cache_path(team_id: int) -> str:
+        # Rosters rarely change within a week, so one cached copy per ISO week
+        year, week, _ = datetime.date.today().isocalendar()
+        return os.path.join(ROSTER_CACHE_DIR, f"roster_{team_id}_{year}-W{week:02d}.parquet")
+    
     @staticmethod
     def fetch_team_roster(team_id: int) -> Optional[pd.DataFrame]:
-        """Fetch roster for a specific team."""
+        """Fetch roster for a specific team, using this week's cached copy if any."""
+        cache_path = TeamRosterFetcher._cache_path(team_id)
+        roster = nba_utils.read_parquet_cache(cache_path)
+        if roster is not None:
+            return roster
+        
         try:
+            nba_utils.stats_rate_limiter.wait()
             roster = commonteamroster.CommonTeamRoster(team_id=team_id).get_data_frames()[0]
             
             if roster.empty or "PLAYER" not in roster.columns:
                 logger.error(f"Roster for team ID {team_id} is empty or malformed")
                 return None
             
-            return roster
-            
         except Exception as e:
             logger.error(f"Failed to fetch roster for team ID {team_id}: {e}")
             return None
+        
+        try:
+            nba_utils.write_parquet_cache(roster, cache_path)
+        except Exception as e:
+            # A missed cache write only costs a refetch next time
+            logger.warning(f"Could not cache roster for team ID {team_id}: {e}")
+        return roster
 
 
 class DataPipeline:
@@ -237,43 +389,70 @@ class DataPipeline:
         self.stats_fetcher = PlayerStatsFetcher()
         self.roster_fetcher = TeamRosterFetcher()
     
-    def process_team_players(
-        self, 
-        team_id: int, 
-        team_abbreviation: str, 
-        team_name: str
-    ) -> List[pd.DataFrame]:
-        """Process all players for a given team."""
-        roster = self.roster_fetcher.fetch_team_roster(team_id)
-        if roster is None:
-            return []
-        
-        logger.info(f"Fetching players from team: {team_name} (ID: {team_id})")
-        
+    def process_teams(
+        self, teams: List[int]
+    ) -> Tuple[List[pd.DataFrame], List[Tuple[str, int]], List[Tuple[str, int]]]:
+        """Fetch rosters and player stats for all teams from one thread pool.
+
+        Returns (all_stats, successful_players, failed_players). Results are
+        collected here on the calling thread, so workers share no state.
+        """
         all_stats = []
+        successful_players = []
+        failed_players = []
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
-                executor.submit(
-                    self.stats_fetcher.fetch_player_stats,
-                    player.to_dict(), 
-                    team_id, 
-                    team_abbreviation, 
-                    team_name
-                )
-                for _, player in roster.iterrows()
-            ]
-            
+            # Player fetches are queued as each roster arrives (in completion
+            # order, so one slow roster doesn't hold back the rest), letting
+            # roster and player requests overlap instead of running team by team
+            roster_futures = {
+                executor.submit(self.roster_fetcher.fetch_team_roster, team_id): team_id
+                for team_id in teams
+            }
+            # Resolve every team's abbreviation in one lookup up front
+            team_abbreviations = dict(zip(teams, nba_utils.map_team_abbr(teams).tolist()))
+            futures = {}
+            for roster_future in as_completed(roster_futures):
+                team_id = roster_futures[roster_future]
+                roster = roster_future.result()
+                if roster is None:
+                    continue
+                team_name = TEAM_ID_MAP.get(team_id, "Unknown")
+                team_abbreviation = team_abbreviations[team_id]
+                logger.info(f"Fetching players from team: {team_name} (ID: {team_id})")
+                # Only two roster columns are needed: zip them instead of
+                # materialising a row object per player
+                for player_name, player_id in zip(
+                    roster["PLAYER"].tolist(), roster["PLAYER_ID"].tolist()
+                ):
+                    future = executor.submit(
+                        self.stats_fetcher.fetch_player_stats,
+                        player_name,
+                        player_id,
+                        team_id,
+                        team_abbreviation,
+                        team_name
+                    )
+                    futures[future] = (player_name, player_id)
+
             for future in as_completed(futures):
                 result = future.result()
                 if result is not None:
                     all_stats.append(result)
-        
-        return all_stats
+                    successful_players.append(futures[future])
+                else:
+                    failed_players.append(futures[future])
+
+        return all_stats, successful_players, failed_players
     
     def save_to_csv(self, df: pd.DataFrame, target_date: datetime.date) -> str:
         """Save DataFrame to CSV file."""
         output_path = os.path.join(OUTPUT_DIR, f"stats_{target_date}.csv")
-        df.to_csv(output_path, index=False)
+        try:
+            # Arrow formats whole columns in C rather than cell by cell
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), output_path)
+        except pa.ArrowException:
+            # Mixed-type object columns (e.g. from the BR fallback) can't be typed
+            df.to_csv(output_path, index=False)
         logger.info(f"Successfully saved CSV to: {output_path}")
         return output_path
     
@@ -285,29 +464,26 @@ class DataPipeline:
         output_path = os.path.join(OUTPUT_DIR, f"stats_{target_date}.csv")
         if os.path.exists(output_path) and not force:
             logger.info(f"Stats already pulled for {target_date} — skipping")
-            return ProcessingResult([], [], [], 0, 0)
+            return ProcessingResult([], [], 0, 0)
         
         # Get teams that played on the target date
         teams = nba_utils.get_team_ids_by_date(target_date)
         if not teams:
             logger.warning(f"No NBA games found for {target_date}")
-            return ProcessingResult([], [], [], 0, 0)
+            return ProcessingResult([], [], 0, 0)
         
         logger.info(f"Found {len(teams)} teams that played on {target_date}")
         
         # Process all teams
-        all_stats = []
-        for team_id in teams:
-            team_name = TEAM_ID_MAP.get(team_id, "Unknown")
-            team_abbreviation = nba_utils.TEAM_ABBR_MAP.get(team_id, "UNK")
-            
-            team_stats = self.process_team_players(team_id, team_abbreviation, team_name)
-            all_stats.extend(team_stats)
+        all_stats, successful_players, failed_players = self.process_teams(teams)
         
         # Process results
         if all_stats:
             df_all = pd.concat(all_stats, ignore_index=True)
+            # Drop the per-player frames so only the combined copy stays alive
+            del all_stats
             df_all = DataProcessor.normalize_dataframe(df_all)
+            df_all = DataProcessor.drop_duplicate_games(df_all)
             
             # Save to CSV
             self.save_to_csv(df_all, target_date)
@@ -316,22 +492,23 @@ class DataPipeline:
             rows_inserted = self._save_to_database(df_all)
             
             return ProcessingResult(
-                successful_players=self.stats_fetcher.successful_players,
-                failed_players=self.stats_fetcher.failed_players,
-                all_stats=all_stats,
+                successful_players=successful_players,
+                failed_players=failed_players,
                 total_rows_processed=len(df_all),
                 total_rows_inserted=rows_inserted
             )
         else:
             logger.warning("No valid player stats to save")
-            return ProcessingResult([], [], [], 0, 0)
+            return ProcessingResult(successful_players, failed_players, 0, 0)
+    
+    def close(self) -> None:
+        """Release the database connection held by the pipeline."""
+        self.db_manager.close()
     
     def _save_to_database(self, df: pd.DataFrame) -> int:
         """Save DataFrame to database."""
         try:
-            conn = self.db_manager.setup_database()
-            rows_inserted = self.db_manager.insert_data(df, conn)
-            conn.close()
+            rows_inserted = self.db_manager.insert_data(df)
             
             logger.info(f"Inserted {rows_inserted} new rows into the database")
             return rows_inserted
@@ -346,7 +523,10 @@ def main():
     pipeline = DataPipeline()
     today = datetime.datetime.now().date() - datetime.timedelta(days=1)
     
-    result = pipeline.pull_stats_by_date(today, force=True)
+    try:
+        result = pipeline.pull_stats_by_date(today, force=True)
+    finally:
+        pipeline.close()
     
     # Log summary
     logger.info(f"Pull complete. Successful players: {len(result.successful_players)}")
@@ -361,70 +541,15 @@ if __name__ == "__main__":
     main()
 
 
-class BRSeasonPipeline:
-    def __init__(self, db_path=DB_PATH, schema_path=SCHEMA_PATH):
-        self.db_path = db_path
-        self.schema_path = schema_path
-        self.fetcher = BasketballReferenceFetcher()
+class BRSeasonPipeline(BRDataPipeline):
+    """Season and incremental pulls on top of BRDataPipeline's schema mapping and insert."""
 
-    def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-        with open(self.schema_path, "r") as f:
-            create_table_sql = f.read()
-        conn.execute(create_table_sql)
-        conn.commit()
-        return conn
-
-    def insert_gamelog(self, df: pd.DataFrame, conn: sqlite3.Connection):
-        if df.empty:
-            logger.warning("No data to insert.")
-            return 0
-        # Map columns to match schema
-        col_map = {
-            'Date': 'game_date',
-            'Team': 'team_abbreviation',
-            'Opp': 'opponent',
-            'MP': 'min',
-            'PTS': 'pts',
-            'FG': 'fgm',
-            'FGA': 'fga',
-            'FG%': 'fg_pct',
-            '3P': 'fg3m',
-            '3PA': 'fg3a',
-            '3P%': 'fg3_pct',
-            'FT': 'ftm',
-            'FTA': 'fta',
-            'FT%': 'ft_pct',
-            'ORB': 'oreb',
-            'DRB': 'dreb',
-            'TRB': 'reb',
-            'AST': 'ast',
-            'STL': 'stl',
-            'BLK': 'blk',
-            'TOV': 'tov',
-            'PF': 'pf',
-            'GmSc': 'gmsc',
-            '+/-': 'plus_minus',
-        }
-        for old, new in col_map.items():
-            if old in df.columns:
-                df[new] = df[old]
-        # Add missing columns
-        for col in ['player_id', 'player_name', 'season_id', 'team_id', 'team_name', 'game_id', 'matchup', 'wl']:
-            if col not in df.columns:
-                df[col] = None
-        # Reorder columns to match schema
-        cursor = conn.cursor()
-        expected_cols = [col[1] for col in cursor.execute("PRAGMA table_info(player_game_logs);")]
-        df = df[[col for col in expected_cols if col in df.columns]]
-        # Insert
-        df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-        logger.info(f"Inserted {len(df)} rows.")
-        return len(df)
-
-    def fetch_and_store_player(self, player_id: str, player_name: str, season: str = "2025"):
+    def fetch_and_store_player(self, player_id: str, player_name: str, season: str = "2025", conn=None):
         logger.info(f"Fetching game log for {player_name} ({player_id}) season {season}")
         df = self.fetcher.get_player_full_gamelog(player_id, season)
+        return self._store_gamelog(df, player_id, player_name, season, conn)
+
+    def _store_gamelog(self, df, player_id, player_name, season, conn=None):
         if df.empty:
             logger.warning(f"No data for {player_name} ({player_id})")
             return 0
@@ -432,49 +557,58 @@ class BRSeasonPipeline:
         df['player_id'] = player_id
         df['player_name'] = player_name
         df['season_id'] = season
-        # Save
-        conn = self.setup_database()
-        count = self.insert_gamelog(df, conn)
-        conn.close()
-        return count
+        # Save, on the caller's connection when one is passed
+        if conn is not None:
+            return self.insert_gamelog(df, conn)
+        with contextlib.closing(self.setup_database()) as own_conn:
+            return self.insert_gamelog(df, own_conn)
 
     def fetch_and_store_season(self, player_list, season: str = "2025"):
         total = 0
-        for player_id, player_name in player_list:
-            total += self.fetch_and_store_player(player_id, player_name, season)
+        # Pages are fetched and parsed on worker threads; inserts stay on this
+        # thread's single connection, so SQLite only ever sees one writer
+        with contextlib.closing(self.setup_database()) as conn, \
+                ThreadPoolExecutor(max_workers=BR_WORKERS) as executor:
+            futures = {
+                executor.submit(self.fetcher.get_player_full_gamelog, player_id, season): (player_id, player_name)
+                for player_id, player_name in player_list
+            }
+            for future in as_completed(futures):
+                player_id, player_name = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to fetch {player_name} ({player_id}): {e}")
+                    continue
+                total += self._store_gamelog(df, player_id, player_name, season, conn)
         logger.info(f"Total rows inserted for season {season}: {total}")
         return total
 
-    def incremental_update_player(self, player_id: str, player_name: str, season: str = "2025"):
-        conn = self.setup_database()
+    def incremental_update_player(self, player_id: str, player_name: str, season: str = "2025", conn=None):
+        if conn is None:
+            with contextlib.closing(self.setup_database()) as own_conn:
+                return self.incremental_update_player(player_id, player_name, season, own_conn)
         cursor = conn.cursor()
         # Find latest game_date for this player/season
         cursor.execute("SELECT MAX(game_date) FROM player_game_logs WHERE player_id=? AND season_id=?", (player_id, season))
         row = cursor.fetchone()
         last_date = row[0] if row and row[0] else None
-        df = self.fetcher.get_player_full_gamelog(player_id, season)
+        # Only games after last_date; an unchanged page isn't parsed at all
+        df = self.fetcher.get_player_gamelog_since(player_id, season, last_date)
         if df.empty:
-            logger.info(f"No data for {player_name} ({player_id})")
-            conn.close()
+            logger.info(f"No new games for {player_name} ({player_id})")
             return 0
         # Add player info
         df['player_id'] = player_id
         df['player_name'] = player_name
         df['season_id'] = season
-        if last_date:
-            df = df[df['Date'] > pd.to_datetime(last_date)]
-        if df.empty:
-            logger.info(f"No new games for {player_name} ({player_id})")
-            conn.close()
-            return 0
-        count = self.insert_gamelog(df, conn)
-        conn.close()
-        return count
+        return self.insert_gamelog(df, conn)
 
     def incremental_update_season(self, player_list, season: str = "2025"):
         total = 0
-        for player_id, player_name in player_list:
-            total += self.incremental_update_player(player_id, player_name, season)
+        with contextlib.closing(self.setup_database()) as conn:
+            for player_id, player_name in player_list:
+                total += self.incremental_update_player(player_id, player_name, season, conn)
         logger.info(f"Total new rows inserted for season {season}: {total}")
         return total
 
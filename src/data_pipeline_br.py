@@ -1,6 +1,7 @@
 import os
 import sqlite3
 import pandas as pd
+from src.db import open_db
 from src.improved_nba_fetcher import BasketballReferenceFetcher
 from src.logger import setup_logger
 
@@ -10,17 +11,50 @@ SCHEMA_PATH = os.path.join(BASE_DIR, "schema", "player_game_logs.sql")
 
 logger = setup_logger(debug=True)
 
+def drop_stored_games(df: pd.DataFrame, conn: sqlite3.Connection) -> pd.DataFrame:
+    """Drop rows without a game_id whose (player_id, game_date) is already stored.
+
+    Basketball Reference rows have no game_id, and UNIQUE(player_id, game_id)
+    never treats two NULLs as equal, so INSERT OR IGNORE can't skip them; a
+    player plays at most once per date, so the date identifies the game instead.
+    Expects game_date as the ISO strings the table stores.
+    """
+    if "game_id" in df.columns:
+        no_id = df["game_id"].isna()
+    else:
+        no_id = pd.Series(True, index=df.index)
+    if not no_id.any():
+        return df
+    # Repeats within the batch
+    keep = ~(no_id & df.duplicated(subset=["player_id", "game_date"]))
+
+    player_ids = df.loc[no_id, "player_id"].dropna().unique().tolist()
+    if player_ids:
+        placeholders = ", ".join("?" * len(player_ids))
+        stored = conn.execute(
+            "SELECT player_id, game_date FROM player_game_logs "
+            f"WHERE player_id IN ({placeholders})",
+            player_ids,
+        ).fetchall()
+        keys = pd.MultiIndex.from_frame(df[["player_id", "game_date"]])
+        keep &= ~(no_id & keys.isin(stored))
+    return df[keep]
+
+
 class BRDataPipeline:
     def __init__(self, db_path=DB_PATH, schema_path=SCHEMA_PATH):
         self.db_path = db_path
         self.schema_path = schema_path
         self.fetcher = BasketballReferenceFetcher()
+        # player_game_logs columns and their INSERT, resolved once on the first insert
+        self._schema_cols = ()
+        self._insert_sql = ""
 
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = open_db(self.db_path)
         with open(self.schema_path, "r") as f:
             create_table_sql = f.read()
-        conn.execute(create_table_sql)
+        conn.executescript(create_table_sql)
         conn.commit()
         return conn
 
@@ -55,21 +89,32 @@ class BRDataPipeline:
             'GmSc': 'gmsc',
             '+/-': 'plus_minus',
         }
-        for old, new in col_map.items():
-            if old in df.columns:
-                df[new] = df[old]
-        # Add missing columns
-        for col in ['player_id', 'player_name', 'season_id', 'team_id', 'team_name', 'game_id', 'matchup', 'wl']:
-            if col not in df.columns:
-                df[col] = None
-        # Reorder columns to match schema
-        cursor = conn.cursor()
-        expected_cols = [col[1] for col in cursor.execute("PRAGMA table_info(player_game_logs);")]
-        df = df[[col for col in expected_cols if col in df.columns]]
-        # Insert
-        df.to_sql("player_game_logs", conn, if_exists="append", index=False)
-        logger.info(f"Inserted {len(df)} rows.")
-        return len(df)
+        df = df.rename(columns=col_map)
+        # Align to the schema in one pass; columns the log lacks become NULL
+        if not self._schema_cols:
+            self._schema_cols = tuple(
+                col[1] for col in conn.execute("PRAGMA table_info(player_game_logs);")
+                if col[1] != "id"
+            )
+            # Same SQL text every call, so sqlite3's statement cache reuses the plan
+            self._insert_sql = (
+                f"INSERT OR IGNORE INTO player_game_logs ({', '.join(self._schema_cols)}) "
+                f"VALUES ({', '.join('?' * len(self._schema_cols))})"
+            )
+        df = df.reindex(columns=self._schema_cols)
+        # sqlite3 can't bind Timestamps; store ISO dates like the other loaders
+        if "game_date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["game_date"]):
+            df = df.assign(game_date=df["game_date"].dt.strftime("%Y-%m-%d"))
+        # One executemany in one transaction, after dropping games already
+        # stored for the player (BR rows have no game_id for OR IGNORE to match)
+        with conn:
+            df = drop_stored_games(df, conn)
+            if df.empty:
+                inserted = 0
+            else:
+                inserted = conn.executemany(self._insert_sql, df.itertuples(index=False, name=None)).rowcount
+        logger.info(f"Inserted {inserted} rows.")
+        return inserted
 
     def fetch_and_store_player(self, player_id: str, player_name: str, season: str = "2025"):
         logger.info(f"Fetching game log for {player_name} ({player_id}) season {season}")
@@ -0,0 +1,23 @@
+import os
+import sqlite3
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DB_PATH = os.path.join(BASE_DIR, "nba_stats.db")
+
+# WAL with relaxed fsync, temp B-trees in RAM, mmap'd reads, 64 MiB page cache,
+# and a short wait instead of "database is locked" when another writer is busy
+CONNECTION_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 10737418240;
+PRAGMA cache_size = -65536;
+PRAGMA busy_timeout = 5000;
+"""
+
+
+def open_db(path: str = DB_PATH) -> sqlite3.Connection:
+    """Open a SQLite connection with the project's standard PRAGMA set."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript(CONNECTION_PRAGMAS)
+    return conn
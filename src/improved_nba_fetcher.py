@@ -1,29 +1,110 @@
+import argparse
+import functools
+import os
+import re
 import requests
+import threading
+import lxml.html
+import orjson
 import pandas as pd
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, date
 from typing import List, Dict, Optional, Any
-import json
+
+from src.logger import setup_logger
+from src.nba_utils import (
+    br_rate_limiter,
+    get_current_season_string,
+    read_parquet_cache,
+    write_parquet_cache,
+)
+
+logger = setup_logger()
+
+# Concurrent requests for the ESPN batch helpers; also the session's pool size
+ESPN_WORKERS = 16
+# How long a parsed Basketball Reference game log for the current season is
+# reused; finished seasons don't change, so their cached copies never expire
+BR_GAMELOG_TTL = 6 * 60 * 60
+# Parsed game logs kept in memory per fetcher, least recently used dropped first
+BR_GAMELOG_MEMO_SIZE = 512
+BR_CACHE_DIR = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..")), "data", "cache", "bbr"
+)
+# Game dates as they appear in a game log's boxscore links, e.g.
+# <a href="/boxscores/202410220LAL.html">2024-10-22</a>
+BOXSCORE_DATE_RE = re.compile(r'href="/boxscores/[^"]+">(\d{4}-\d{2}-\d{2})<')
+# Basketball Reference pages in flight for fetch_many; the shared rate limiter
+# still spaces the requests themselves
+BR_WORKERS = 4
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+@functools.lru_cache(maxsize=1)
+def _espn_session() -> requests.Session:
+    """Session shared by every ESPNDataFetcher, so keep-alive connections
+    outlive any one fetcher instead of re-doing the TLS handshake."""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'application/json',
+        'Referer': 'https://www.espn.com/'
+    })
+    # Keep-alive pool big enough for the batch helpers; 429/5xx responses
+    # are retried with exponential backoff instead of failing the batch
+    retries = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    session.mount("https://", HTTPAdapter(pool_maxsize=ESPN_WORKERS, max_retries=retries))
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def _br_session() -> requests.Session:
+    """Session shared by every BasketballReferenceFetcher."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
 
 class ESPNDataFetcher:
     """Improved NBA data fetcher using ESPN API."""
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         self.base_url = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json',
-            'Referer': 'https://www.espn.com/'
-        })
+        self.session = session or _espn_session()
+        # The team list doesn't change mid-run; fetched once per fetcher
+        self._teams = None
+    
+    def _fetch_many(self, fn, keys, **kwargs) -> Dict[str, Any]:
+        # Network-bound: threads overlap the waits on the shared session
+        keys = list(keys)
+        with ThreadPoolExecutor(max_workers=ESPN_WORKERS) as executor:
+            return dict(zip(keys, executor.map(lambda key: fn(key, **kwargs), keys)))
+    
+    def probe(self) -> bool:
+        """Cheap connectivity check: HEAD the teams endpoint, no payload."""
+        response = self.session.head(f"{self.base_url}/teams", timeout=5)
+        return response.status_code == 200
     
     def get_teams(self) -> List[Dict[str, Any]]:
         """Get all NBA teams."""
+        if self._teams is not None:
+            return list(self._teams)
         url = f"{self.base_url}/teams"
         response = self.session.get(url)
         response.raise_for_status()
         
-        data = response.json()
+        # orjson decodes the raw bytes in one native pass
+        data = orjson.loads(response.content)
         teams = []
         
         for sport in data.get('sports', []):
@@ -37,7 +118,8 @@ class ESPNDataFetcher:
                         'location': team_info.get('location')
                     })
         
-        return teams
+        self._teams = teams
+        return list(teams)
     
     def get_team_roster(self, team_id: str) -> List[Dict[str, Any]]:
         """Get roster for a specific team."""
@@ -45,7 +127,7 @@ class ESPNDataFetcher:
         response = self.session.get(url)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         players = []
         
         for athlete in data.get('athletes', []):
@@ -58,6 +140,10 @@ class ESPNDataFetcher:
         
         return players
     
+    def get_rosters(self, team_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get rosters for several teams concurrently, keyed by team ID."""
+        return self._fetch_many(self.get_team_roster, team_ids)
+    
     def get_player_stats(self, player_id: str, season: str = "2024-25") -> pd.DataFrame:
         """Get player statistics for a season."""
         url = f"{self.base_url}/athletes/{player_id}/stats"
@@ -69,7 +155,7 @@ class ESPNDataFetcher:
         response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Parse the stats data
         stats_list = []
@@ -98,18 +184,21 @@ class ESPNDataFetcher:
         response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         games = []
         
         for event in data.get('events', []):
+            # Walk down to the two competitors once rather than per field
+            competitors = event.get('competitions', [{}])[0].get('competitors', [{}])
+            home, away = competitors[0], competitors[1]
             game_info = {
                 'id': event.get('id'),
                 'date': event.get('date'),
                 'status': event.get('status', {}).get('type', {}).get('name'),
-                'home_team': event.get('competitions', [{}])[0].get('competitors', [{}])[0].get('team', {}).get('name'),
-                'away_team': event.get('competitions', [{}])[0].get('competitors', [{}])[1].get('team', {}).get('name'),
-                'home_score': event.get('competitions', [{}])[0].get('competitors', [{}])[0].get('score'),
-                'away_score': event.get('competitions', [{}])[0].get('competitors', [{}])[1].get('score')
+                'home_team': home.get('team', {}).get('name'),
+                'away_team': away.get('team', {}).get('name'),
+                'home_score': home.get('score'),
+                'away_score': away.get('score')
             }
             games.append(game_info)
         
@@ -127,7 +216,7 @@ class ESPNDataFetcher:
         response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         game_logs = []
         
         # Parse the stats data to extract game logs
@@ -158,28 +247,66 @@ class ESPNDataFetcher:
                         break
         
         return pd.DataFrame(game_logs)
+    
+    def get_players_game_logs(
+        self, player_ids: List[str], season: str = "2024-25", limit: int = 15
+    ) -> Dict[str, pd.DataFrame]:
+        """Get game logs for several players concurrently, keyed by player ID."""
+        return self._fetch_many(self.get_player_game_logs, player_ids, season=season, limit=limit)
 
 
 class BasketballReferenceFetcher:
     """Alternative data fetcher using Basketball Reference."""
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
         self.base_url = "https://www.basketball-reference.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = session or _br_session()
+        # (player_id, season) -> (fetched_at, parsed game log), oldest use first;
+        # fetch_many reads and fills it from several threads
+        self._gamelog_cache = OrderedDict()
+        self._gamelog_cache_lock = threading.Lock()
+    
+    def probe(self) -> bool:
+        """Cheap connectivity check: HEAD the home page, no rate-limited page load."""
+        response = self.session.head(self.base_url, timeout=5)
+        return response.status_code == 200
+    
+    @staticmethod
+    def _read_stat_tables(html: str) -> List[pd.DataFrame]:
+        """Parse the page's tables with a PTS header straight from the lxml tree.
+
+        Cells come back as stripped strings (None when empty) under the last
+        header row's names; callers coerce the columns they use, so none of
+        read_html's per-column type inference is needed.
+        """
+        doc = lxml.html.fromstring(html)
+        frames = []
+        for table in doc.xpath('//table[.//th[normalize-space()="PTS"]]'):
+            header_rows = table.xpath("./thead/tr")
+            if not header_rows:
+                continue
+            columns = [
+                cell.text_content().strip() or f"Unnamed: {i}"
+                for i, cell in enumerate(header_rows[-1].xpath("./th|./td"))
+            ]
+            # Skip the header rows BR repeats every 20 games
+            rows = [
+                [cell.text_content().strip() or None for cell in row.xpath("./th|./td")][: len(columns)]
+                for row in table.xpath('./tbody/tr[not(contains(@class, "thead"))]')
+            ]
+            frames.append(pd.DataFrame(rows, columns=columns))
+        return frames
     
     def get_player_stats(self, player_id: str, season: str = "2024-25") -> pd.DataFrame:
         """Get player statistics from Basketball Reference."""
         url = f"{self.base_url}/players/{player_id[0]}/{player_id}/gamelog/{season}/"
         
+        br_rate_limiter.wait()
         response = self.session.get(url)
         response.raise_for_status()
         
         # Parse HTML table
-        from io import StringIO
-        tables = pd.read_html(StringIO(response.text))
+        tables = self._read_stat_tables(response.text)
         
         # Find the game log table
         for table in tables:
@@ -194,24 +321,90 @@ class BasketballReferenceFetcher:
         player_id: Basketball Reference ID (e.g., 'jamesle01')
         season: 4-digit year for the END of the season (e.g., '2025' for 2024-25)
         """
-        from io import StringIO
-        import numpy as np
+        # Callers add columns to the result, so hand out copies of the cached frame
+        gamelog = self._cached_gamelog(player_id, season)
+        if gamelog is None:
+            html = self._fetch_gamelog_page(player_id, season)
+            gamelog = self._parse_gamelog(html, player_id, season)
+        return gamelog.copy()
+    
+    def get_player_gamelog_since(
+        self, player_id: str, season: str = "2025", last_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Games after last_date (all games when None).
+
+        When the page has to be downloaded, its newest date is read off the
+        boxscore links first; if that's not after last_date the page isn't
+        parsed at all and an empty frame comes back.
+        """
+        gamelog = self._cached_gamelog(player_id, season)
+        if gamelog is None:
+            html = self._fetch_gamelog_page(player_id, season)
+            newest = max(BOXSCORE_DATE_RE.findall(html), default=None)
+            if last_date and newest is not None and newest <= str(last_date)[:10]:
+                return pd.DataFrame()
+            gamelog = self._parse_gamelog(html, player_id, season)
+        if last_date:
+            gamelog = gamelog[gamelog['Date'] > pd.to_datetime(last_date)]
+        return gamelog.copy()
+    
+    def _gamelog_cache_path(self, player_id: str, season: str) -> str:
+        return os.path.join(BR_CACHE_DIR, f"{player_id}_{season}.parquet")
+    
+    def _cached_gamelog(self, player_id: str, season: str) -> Optional[pd.DataFrame]:
+        """The parsed log from memory or the parquet cache, or None if stale/missing."""
+        key = (player_id, season)
+        with self._gamelog_cache_lock:
+            cached = self._gamelog_cache.get(key)
+            if cached is not None:
+                if time.monotonic() - cached[0] < BR_GAMELOG_TTL:
+                    self._gamelog_cache.move_to_end(key)
+                    return cached[1]
+                del self._gamelog_cache[key]
+        
+        cache_path = self._gamelog_cache_path(player_id, season)
+        if self._disk_cache_fresh(cache_path, season):
+            # A corrupt file is dropped and refetched rather than pinning the
+            # player/season to an error (finished seasons never expire)
+            gamelog = read_parquet_cache(cache_path)
+            if gamelog is not None:
+                self._remember_gamelog(player_id, season, gamelog)
+                return gamelog
+        return None
+    
+    def _remember_gamelog(self, player_id: str, season: str, gamelog: pd.DataFrame) -> None:
+        """Memoize a parsed log, dropping expired and least recently used entries."""
+        now = time.monotonic()
+        with self._gamelog_cache_lock:
+            cache = self._gamelog_cache
+            cache[(player_id, season)] = (now, gamelog)
+            cache.move_to_end((player_id, season))
+            expired = [
+                key for key, (fetched_at, _) in cache.items()
+                if now - fetched_at >= BR_GAMELOG_TTL
+            ]
+            for key in expired:
+                del cache[key]
+            while len(cache) > BR_GAMELOG_MEMO_SIZE:
+                cache.popitem(last=False)
+    
+    def _fetch_gamelog_page(self, player_id: str, season: str) -> str:
         url = f"{self.base_url}/players/{player_id[0]}/{player_id}/gamelog/{season}/"
+        br_rate_limiter.wait()
         response = self.session.get(url)
         response.raise_for_status()
-        tables = pd.read_html(StringIO(response.text))
+        return response.text
+    
+    def _parse_gamelog(self, html: str, player_id: str, season: str) -> pd.DataFrame:
+        """Clean the page's stat tables into one game log and cache it."""
+        tables = self._read_stat_tables(html)
         
         # Combine all tables that have 'PTS' column (regular season + playoffs)
         all_games = []
         for table in tables:
             if 'PTS' in table.columns:
-                # Remove header rows and rows where Rk is not numeric
-                clean_table = table.copy()
-                # Filter out rows where Rk is not a number or is NaN
-                clean_table = clean_table[
-                    clean_table['Rk'].apply(lambda x: pd.notna(x) and str(x).replace('.', '').isdigit())
-                ].reset_index(drop=True)
-                
+                # Drop repeated header rows: keep only rows where Rk is a number
+                clean_table = table[pd.to_numeric(table['Rk'], errors='coerce').notna()]
                 if not clean_table.empty:
                     all_games.append(clean_table)
         
@@ -221,19 +414,56 @@ class BasketballReferenceFetcher:
         # Combine all tables
         gamelog = pd.concat(all_games, ignore_index=True)
         
-        # Convert numeric columns
-        num_cols = ['Gcar', 'Gtm', 'GS', 'MP', 'FG', 'FGA', 'FG%', '3P', '3PA', '3P%', '2P', '2PA', '2P%', 'eFG%', 'FT', 'FTA', 'FT%', 'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'GmSc', '+/-']
-        for col in num_cols:
-            if col in gamelog.columns:
-                gamelog[col] = pd.to_numeric(gamelog[col], errors='coerce')
+        # Convert numeric columns in one pass
+        num_cols = ['Rk', 'G', 'Gcar', 'Gtm', 'GS', 'MP', 'FG', 'FGA', 'FG%', '3P', '3PA', '3P%', '2P', '2PA', '2P%', 'eFG%', 'FT', 'FTA', 'FT%', 'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'GmSc', '+/-']
+        present = [col for col in num_cols if col in gamelog.columns]
+        gamelog[present] = gamelog[present].apply(pd.to_numeric, errors='coerce')
         
         # Parse date
         gamelog['Date'] = pd.to_datetime(gamelog['Date'], errors='coerce')
         
         # Sort by date
-        gamelog = gamelog.sort_values('Date').reset_index(drop=True)
+        gamelog = gamelog.sort_values('Date', ignore_index=True)
         
+        self._remember_gamelog(player_id, season, gamelog)
+        try:
+            write_parquet_cache(gamelog, self._gamelog_cache_path(player_id, season))
+        except Exception as e:
+            # A missed cache write only costs a refetch next time
+            logger.warning(f"Could not cache game log for {player_id} ({season}): {e}")
         return gamelog
+    
+    @staticmethod
+    def _disk_cache_fresh(cache_path: str, season: str) -> bool:
+        if not os.path.exists(cache_path):
+            return False
+        # Compare end years: BR names a season by it ('2025'), the NBA style
+        # '2024-25' by its start. Any season ending before the current one is over.
+        current_end_year = int(get_current_season_string()[:4]) + 1
+        season_end_year = int(season[:4]) + 1 if '-' in season else int(season)
+        if season_end_year < current_end_year:
+            return True
+        return time.time() - os.path.getmtime(cache_path) < BR_GAMELOG_TTL
+    
+    def fetch_many(
+        self, player_ids: List[str], season: str = "2025", max_workers: int = BR_WORKERS
+    ) -> Dict[str, pd.DataFrame]:
+        """Fetch several full game logs concurrently, keyed by player ID.
+
+        Players whose page fails to load or parse are left out of the result.
+        """
+        gamelogs = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_player_full_gamelog, player_id, season): player_id
+                for player_id in player_ids
+            }
+            for future in as_completed(futures):
+                try:
+                    gamelogs[futures[future]] = future.result()
+                except Exception as e:
+                    logger.warning(f"Basketball Reference fetch failed for {futures[future]}: {e}")
+        return gamelogs
 
 
 # Factory function to choose the best available data source
@@ -288,5 +518,23 @@ def test_data_sources():
         print(f"❌ Basketball Reference failed: {e}")
 
 
+def probe_data_sources():
+    """HEAD-only check that each source is reachable."""
+    for name, fetcher in (("ESPN API", ESPNDataFetcher()), ("Basketball Reference", BasketballReferenceFetcher())):
+        try:
+            ok = fetcher.probe()
+            print(f"{'✅' if ok else '❌'} {name}: {'reachable' if ok else 'unexpected status'}")
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+
+
 if __name__ == "__main__":
-    test_data_sources() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check the NBA data sources.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--probe", action="store_true", help="HEAD each source only (default)")
+    mode.add_argument("--full", action="store_true", help="fetch teams, a roster and game logs")
+    args = parser.parse_args()
+    if args.full:
+        test_data_sources()
+    else:
+        probe_data_sources() 
\ No newline at end of file
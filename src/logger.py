@@ -1,4 +1,12 @@
+import atexit
+import functools
 import logging
+import multiprocessing
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
 
 
 class ColoredFormatter(logging.Formatter):
@@ -11,23 +19,56 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Color codes keyed by numeric level, resolved once
+        self._colors = {
+            logging.getLevelName(name): color for name, color in self.COLORS.items()
+        }
+
     def format(self, record):
-        color = self.COLORS.get(record.levelname, self.RESET)
-        message = super().format(record)
-        return f"{color}{message}{self.RESET}"
+        color = self._colors.get(record.levelno, self.RESET)
+        return color + super().format(record) + self.RESET
+
+
+def _console_handler():
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColoredFormatter(LOG_FORMAT))
+    return handler
+
+
+def _write_directly(logger, queue_handler):
+    # Forked children inherit the QueueHandler but not the listener thread,
+    # so anything they queued would never be written
+    logger.removeHandler(queue_handler)
+    logger.addHandler(_console_handler())
 
 
 def setup_logger(name="nba_logger", debug=False):
     level = logging.DEBUG if debug else logging.INFO
-    formatter = ColoredFormatter("[%(asctime)s] %(levelname)s: %(message)s")
-
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    if not logger.handlers:
-        logger.addHandler(handler)
+    if logger.handlers:
+        return logger
+
+    if multiprocessing.parent_process() is not None:
+        # Spawned worker process: no listener runs here, write straight out
+        logger.addHandler(_console_handler())
+        return logger
+
+    # Callers only enqueue the record; the listener thread formats and
+    # writes it, so fetch workers don't block on the console
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, _console_handler())
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(
+            after_in_child=functools.partial(_write_directly, logger, queue_handler)
+        )
 
     return logger
@@ -1,13 +1,48 @@
+import contextlib
+import functools
+import logging
 import os
+import tempfile
+import threading
 import time
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 from nba_api.stats.endpoints import playergamelog, scoreboardv2
 from nba_api.stats.library.http import NBAStatsHTTP
 from nba_api.stats.static import teams
 
 number_of_games = 15
 
+logger = logging.getLogger("nba_logger")
+
+
+class RateLimiter:
+    """Space calls at least `interval` seconds apart across all threads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Shared by every worker hitting stats.nba.com; roughly the pace the old
+# per-worker 3s sleep gave with 5 threads
+stats_rate_limiter = RateLimiter(0.6)
+
+# basketball-reference.com blocks clients making more than 20 requests a minute
+br_rate_limiter = RateLimiter(3.0)
+
 TEAM_ABBR_MAP = {
     1610612737: "ATL",
     1610612738: "BOS",
@@ -37,14 +72,63 @@ TEAM_ABBR_MAP = {
     1610612758: "SAC",
     1610612759: "SAS",
     1610612761: "TOR",
-    1610612741: "UTA",
+    1610612762: "UTA",
     1610612764: "WAS",
 }
 
+# Sorted ids and their abbreviations, for mapping a whole column at once
+_TEAM_IDS = np.array(sorted(TEAM_ABBR_MAP), dtype=np.int64)
+_TEAM_ABBRS = np.array(
+    [TEAM_ABBR_MAP[team_id] for team_id in _TEAM_IDS.tolist()], dtype=object
+)
+
+
+def map_team_abbr(team_ids, default="UNK"):
+    """Vectorised TEAM_ABBR_MAP.get over an array of team ids."""
+    team_ids = np.asarray(team_ids, dtype=np.int64)
+    idx = np.searchsorted(_TEAM_IDS, team_ids).clip(max=len(_TEAM_IDS) - 1)
+    return np.where(_TEAM_IDS[idx] == team_ids, _TEAM_ABBRS[idx], default)
+
+
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "nba_stats.db"))
 
 
+def read_parquet_cache(path):
+    """Load a parquet cache file, or None on a miss.
+
+    An unreadable file (e.g. truncated by a killed run) counts as a miss and
+    is removed so the caller's refetch can replace it.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable cache file {path}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        return None
+
+
+def write_parquet_cache(df, path):
+    """Write `df` to `path` atomically: a temp file in the same directory,
+    then os.replace, so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".parquet.tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=1)
 def get_team_ids():
+    # Static team list; callers share the one dict and must not mutate it
     return {team["id"]: team["full_name"] for team in teams.get_teams()}
 
 
@@ -73,11 +157,11 @@ def get_recent_games_for_player(player_id, num_games=number_of_games, season=Non
             "x-nba-stats-token": "true",
         }
 
+        stats_rate_limiter.wait()
         log = playergamelog.PlayerGameLog(
             player_id=player_id, season=season, timeout=15
         )
         df = log.get_data_frames()[0]
-        time.sleep(3)
         return df.head(num_games)
 
     except Exception as e:
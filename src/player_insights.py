@@ -1,143 +1,196 @@
+import numpy as np
 import pandas as pd
-from scipy.stats import norm
+from scipy.special import ndtr
+
+STATS = ["pts", "reb", "ast"]
+
+
+def _narrow_with_dates(df, stats):
+    """Only the columns the insights read, parsing game_date if it isn't already.
+
+    The dashboard loads game_date as datetime64, so there it's a projection
+    with no conversion and no full-frame copy.
+    """
+    df = df[["player_id", "player_name", "game_date", *stats]]
+    if not pd.api.types.is_datetime64_any_dtype(df["game_date"]):
+        df = df.assign(game_date=pd.to_datetime(df["game_date"]))
+    return df
 
 
 def calculate_player_insights(df, game_limit=5):
-    df = df.copy()
-    df["game_date"] = pd.to_datetime(df["game_date"])
-
-    insights = []
-
-    for player_id, group in df.groupby("player_id"):
-        group = group.sort_values("game_date")
-
-        # Season average
-        season_avg = group[["pts", "reb", "ast"]].mean()
-
-        # Rolling avg over last N games
-        recent = group.tail(game_limit)
-        recent_avg = recent[["pts", "reb", "ast"]].mean()
-
-        # % Delta vs season
-        deltas = ((recent_avg - season_avg) / season_avg * 100).round(2)
-
-        insights.append(
-            {
-                "player_id": player_id,
-                "player_name": group["player_name"].iloc[0],
-                "games_played": len(group),
-                "avg_pts_recent": recent_avg["pts"],
-                "avg_pts_season": season_avg["pts"],
-                "pts_delta_pct": deltas["pts"],
-                "avg_reb_recent": recent_avg["reb"],
-                "avg_reb_season": season_avg["reb"],
-                "reb_delta_pct": deltas["reb"],
-                "avg_ast_recent": recent_avg["ast"],
-                "avg_ast_season": season_avg["ast"],
-                "ast_delta_pct": deltas["ast"],
-            }
-        )
+    df = _narrow_with_dates(df, STATS)
+    # One stable sort: each player's rows end up chronological, ties in input order
+    df = df.sort_values(["player_id", "game_date"], kind="stable")
+    by_player = df.groupby("player_id")
+
+    # Season average and rolling avg over last N games, for every player at once
+    season_avg = by_player[STATS].mean()
+    recent_avg = by_player.tail(game_limit).groupby("player_id")[STATS].mean()
+
+    # % Delta vs season
+    deltas = ((recent_avg - season_avg) / season_avg * 100).round(2)
 
-    return pd.DataFrame(insights)
+    names = df.drop_duplicates("player_id").set_index("player_id")["player_name"]
+    insights = pd.DataFrame({"player_name": names, "games_played": by_player.size()})
+    for stat in STATS:
+        insights[f"avg_{stat}_recent"] = recent_avg[stat]
+        insights[f"avg_{stat}_season"] = season_avg[stat]
+        insights[f"{stat}_delta_pct"] = deltas[stat]
 
-def calculate_prop_hit_rates(df, game_limits=[5, 10, 15]):
+    return insights.rename_axis("player_id").reset_index()
+
+
+def calculate_prop_hit_rates(df, game_limits=(5, 10, 15)):
     props = {
         "pts": 15.5,
         "reb": 6.5,
         "ast": 4.5,
     }
 
-    df = df.copy()
-    df["game_date"] = pd.to_datetime(df["game_date"])
-
-    all_data = []
+    df = _narrow_with_dates(df, list(props))
+    # Most recent first within each player, players in id order
+    df = df.sort_values(
+        ["player_id", "game_date"], ascending=[True, False], kind="stable"
+    )
+    by_player = df.groupby("player_id")
+
+    # Each player's rows are contiguous: the Lw window ends at start + min(w, games) - 1
+    games = by_player.size()
+    starts = games.cumsum().to_numpy() - games.to_numpy()
+
+    names = df.drop_duplicates("player_id").set_index("player_id")["player_name"]
+    rates = pd.DataFrame({"player_name": names})
+    for stat, line in props.items():
+        # Running hit count down each player's games: entry k is hits in the last k + 1
+        hits = (df[stat] > line).groupby(df["player_id"]).cumsum().to_numpy()
+        for window in game_limits:
+            total = np.minimum(window, games.to_numpy())
+            hit_count = hits[starts + total - 1]
+            pct = np.round(hit_count / total * 100, 1)
+            rates[f"{stat}_L{window}"] = [
+                f"{h}/{n} ({p}%)"
+                for h, n, p in zip(
+                    hit_count.tolist(), total.tolist(), pct.tolist(), strict=True
+                )
+            ]
+
+    return rates.rename_axis("player_id").reset_index()
+
+
+def _hits_in_latest(hits, starts, k):
+    """Hits in each player's latest k games, read off the running hit counts."""
+    return np.where(k > 0, hits[starts + np.maximum(k, 1) - 1], 0).astype(np.int64)
+
+
+# calculate_prop_summary's trend codes and how the table renders them
+TREND_LABELS = {1: "🔥", 0: "↔️", -1: "↘️"}
+
+
+def calculate_prop_summary(df, props, windows=(5, 10, 15), include_stats=("pts",)):
+    """Numeric prop summary: one row per (player, stat), nothing formatted.
+
+    L{w}_hits / L{w}_games count hits over each player's latest w games, trend
+    is 1 when every recent game hit, -1 when none did, 0 otherwise, and
+    over_prob is the normal-fit chance of going over (NaN with fewer than five
+    games or no spread).
+    """
+    df = _narrow_with_dates(df, list(props))
+    # Most recent first within each player, players in id order
+    df = df.sort_values(
+        ["player_id", "game_date"], ascending=[True, False], kind="stable"
+    )
+    player_ids = df["player_id"]
+
+    # Each player's rows are contiguous, starting at `starts`
+    games = player_ids.groupby(player_ids).size().to_numpy()
+    starts = np.cumsum(games) - games
+
+    # The trend reads the first five entries of the windows' hit sequences laid
+    # end to end; those are always each player's `trend_games` latest games
+    trend_games = np.zeros_like(games)
+    remaining = np.full_like(games, 5)
+    for window in windows:
+        take = np.minimum(np.minimum(window, games), remaining)
+        trend_games = np.maximum(trend_games, take)
+        remaining -= take
+
+    # Only include selected stats
+    active_stats = {"pts", *include_stats}  # "pts" always included
+    stats = [stat for stat in props if stat in active_stats]
+
+    per_stat = []
+    for stat in stats:
+        line = props[stat]
+        # Running hit count down each player's games: entry k is hits in the last k + 1
+        hits = (df[stat] > line).groupby(player_ids).cumsum().to_numpy()
+
+        columns = {}
+        for window in windows:
+            total = np.minimum(window, games)
+            columns[f"L{window}_hits"] = _hits_in_latest(hits, starts, total)
+            columns[f"L{window}_games"] = total
+
+        trend_hits = _hits_in_latest(hits, starts, trend_games)
+        columns["trend"] = np.where(
+            trend_hits == trend_games, 1, np.where(trend_hits == 0, -1, 0)
+        )
 
-    for player_id, group in df.groupby("player_id"):
-        group = group.sort_values("game_date", ascending=False)
-        row = {
-            "player_id": player_id,
-            "player_name": group["player_name"].iloc[0],
+        # Statistical estimate using normal distribution
+        values = df[stat].groupby(player_ids)
+        stds = values.std().to_numpy()
+        estimable = (values.count().to_numpy() >= 5) & (stds > 0)
+        # ndtr is the standard normal CDF without norm.cdf's rv_continuous overhead
+        z = (line - values.mean().to_numpy()) / np.where(estimable, stds, 1.0)
+        probs = np.round((1 - ndtr(z)) * 100, 1)
+        columns["over_prob"] = np.where(estimable, probs, np.nan)
+        per_stat.append(columns)
+
+    # Interleave the per-stat arrays so each player's stats are adjacent rows
+    summary = pd.DataFrame(
+        {
+            "player": np.repeat(df["player_name"].to_numpy()[starts], len(stats)),
+            "stat": np.tile(stats, len(games)),
         }
-
-        for stat, line in props.items():
-            for window in game_limits:
-                recent = group.head(window)
-                if recent.empty:
-                    continue
-
-                hit_count = (recent[stat] > line).sum()
-                total = len(recent)
-                pct = round((hit_count / total) * 100, 1) if total else 0
-
-                label = f"{stat}_L{window}"
-                row[label] = f"{hit_count}/{total} ({pct}%)"
-
-        all_data.append(row)
-
-    return pd.DataFrame(all_data)
-
-
-def generate_prop_summary_table(df, props, windows=[5, 10, 15], include_stats=["pts"]):
-    df = df.copy()
-    df["game_date"] = pd.to_datetime(df["game_date"])
-    results = []
-
-    for player_id, group in df.groupby("player_id"):
-        group = group.sort_values("game_date", ascending=False)
-        player_name = group["player_name"].iloc[0]
-
-        # Only include selected stats
-        active_stats = ["pts"] + include_stats  # "pts" always included
-
-        for stat, line in props.items():
-            if stat not in active_stats:
-                continue
-            row = {"player": player_name, "prop": f"{stat.upper()} ({line})"}
-
-            hit_sequence = []
-
-            for window in windows:
-                recent = group.head(window)
-                if recent.empty:
-                    row[f"L{window}"] = "N/A"
-                    continue
-
-                hit_count = (recent[stat] > line).sum()
-                pct = round((hit_count / len(recent)) * 100)
-                emoji = "✅" if pct >= 70 else "⚠️" if pct >= 40 else "❌"
-                row[f"L{window}"] = f"{hit_count}/{len(recent)} {emoji}"
-                hit_sequence.extend(recent[stat] > line)
-
-            # Trend summary
-            row["Trend"] = (
-                "🔥"
-                if all(hit_sequence[:5])
-                else "↘️" if hit_sequence[:5].count(True) == 0 else "↔️"
-            )
-            # Statistical estimate using normal distribution
-            all_values = group[stat].dropna()
-            if len(all_values) >= 5:
-                mean = all_values.mean()
-                std = all_values.std()
-                if std > 0:
-                    prob = round((1 - norm.cdf(line, loc=mean, scale=std)) * 100, 1)
-                    row[f"Est. Over {stat.upper()} {line}"] = f"{prob}%"
-                else:
-                    row["Est. Over Chance"] = "--"
-            else:
-                prob_estimates = [
-                    float(row[col].strip("%"))
-                    for col in row
-                    if col.startswith("Est. Over")
-                    and isinstance(row[col], str)
-                    and row[col].endswith("%")
-                ]
-
-                if prob_estimates:
-                    row["Est. Over Chance"] = f"{max(prob_estimates)}%"
-                else:
-                    row["Est. Over Chance"] = "--"
-
-            results.append(row)
-
-    return pd.DataFrame(results)
+    )
+    summary["line"] = summary["stat"].map(props)
+    for column in per_stat[0] if per_stat else []:
+        summary[column] = np.column_stack([cols[column] for cols in per_stat]).ravel()
+    return summary
+
+
+def generate_prop_summary_table(df, props, windows=(5, 10, 15), include_stats=("pts",)):
+    summary = calculate_prop_summary(
+        df, props, windows=windows, include_stats=include_stats
+    )
+    if summary.empty:
+        return pd.DataFrame()
+
+    stat_labels = summary["stat"].str.upper()
+    table = pd.DataFrame(
+        {
+            "player": summary["player"],
+            "prop": stat_labels + " (" + summary["line"].astype(str) + ")",
+        }
+    )
+    for window in windows:
+        hits, games = summary[f"L{window}_hits"], summary[f"L{window}_games"]
+        emoji = pd.cut(
+            (hits / games * 100).round(),
+            bins=[-np.inf, 40, 70, np.inf],
+            right=False,
+            labels=["❌", "⚠️", "✅"],
+        ).astype(str)
+        table[f"L{window}"] = hits.astype(str) + "/" + games.astype(str) + " " + emoji
+    table["Trend"] = summary["trend"].map(TREND_LABELS)
+
+    # Estimated rows get a per-prop column; the rest share "Est. Over Chance"
+    estimated = summary["over_prob"].notna()
+    est_columns = np.where(
+        estimated,
+        "Est. Over " + stat_labels + " " + summary["line"].astype(str),
+        "Est. Over Chance",
+    )
+    cells = np.where(estimated, summary["over_prob"].astype(str) + "%", "--")
+    for column in pd.unique(est_columns):
+        table[column] = pd.Series(cells, index=table.index).where(est_columns == column)
+    return table
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from src.data_pipeline import INDEXES_PATH, DatabaseManager
+from src.data_pipeline_br import BRDataPipeline
+
+
+def make_logs(player_id, game_ids):
+    return pd.DataFrame(
+        {
+            "player_id": player_id,
+            "player_name": f"Player {player_id}",
+            "game_id": [f"G{game_id:04d}" for game_id in game_ids],
+            "game_date": "2025-01-01",
+            "pts": game_ids,
+        }
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(db_path=str(tmp_path / "test.db"))
+    conn = manager.setup_database()
+    with open(INDEXES_PATH) as f:
+        conn.executescript(f.read())
+    yield manager
+    manager.close()
+
+
+def stored_rows(db):
+    return db.conn.execute(
+        "SELECT player_id, game_id, pts FROM player_game_logs ORDER BY player_id, game_id"
+    ).fetchall()
+
+
+def index_names(db):
+    return {
+        row[0]
+        for row in db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )
+    }
+
+
+def test_multi_row_statements_cover_chunk_boundaries(db):
+    # 30 schema columns and 999 variables per statement: 33 rows per INSERT
+    step = db._rows_per_statement
+    assert step == 33
+
+    for player_id, count in ((1, step), (2, 2 * step + 1), (3, step - 1)):
+        df = make_logs(player_id, range(count))
+        assert db.insert_data(df) == count
+
+    rows = stored_rows(db)
+    assert len(rows) == 33 + 67 + 32
+    # Values stay lined up with their columns across the full/remainder split
+    assert all(pts == int(game_id[1:]) for _, game_id, pts in rows)
+    assert (2, "G0066", 66) in rows
+
+
+def test_rowcount_excludes_duplicates(db):
+    assert db.insert_data(make_logs(7, range(5))) == 5
+
+    # Three stored games, two new ones, and one repeated within the batch
+    batch = make_logs(7, [2, 3, 4, 5, 6, 6])
+    assert db.insert_data(batch) == 2
+    assert len(stored_rows(db)) == 7
+
+
+def test_bulk_load_drops_and_restores_secondary_indexes(db, monkeypatch):
+    secondary = {name for name, _ in DatabaseManager._secondary_indexes()}
+    assert secondary <= index_names(db)
+
+    seen_during_insert = []
+    chunked_insert = DatabaseManager._chunked_insert
+
+    def spy(self, conn, rows):
+        seen_during_insert.append(index_names(self))
+        return chunked_insert(self, conn, rows)
+
+    monkeypatch.setattr(DatabaseManager, "_chunked_insert", spy)
+
+    assert db.insert_data(make_logs(1, range(40)), bulk_load=True) == 40
+    assert not secondary & seen_during_insert[0]
+    assert secondary <= index_names(db)
+
+    # Without bulk_load the indexes stay in place
+    db.insert_data(make_logs(2, range(3)))
+    assert secondary <= seen_during_insert[1]
+
+
+def test_failed_batch_rolls_back_and_connection_stays_usable(db, monkeypatch):
+    db.insert_data(make_logs(1, range(3)))
+
+    chunked_insert = DatabaseManager._chunked_insert
+
+    def insert_then_fail(self, conn, rows):
+        # A non-sqlite3 error after rows were already written in the transaction
+        chunked_insert(self, conn, rows)
+        raise TypeError("bad row")
+
+    monkeypatch.setattr(DatabaseManager, "_chunked_insert", insert_then_fail)
+    with pytest.raises(TypeError):
+        db.insert_data(make_logs(2, range(40)))
+    monkeypatch.undo()
+
+    assert not db.conn.in_transaction
+    assert len(stored_rows(db)) == 3
+    assert db.insert_data(make_logs(2, range(2))) == 2
+
+
+def test_rows_without_game_id_dedupe_on_date(db, tmp_path):
+    # Basketball Reference fallback rows: no game_id for the unique index
+    br = make_logs(9, range(3)).assign(
+        game_id=None, game_date=["2025-01-01", "2025-01-02", "2025-01-02"]
+    )
+    assert db.insert_data(br) == 2
+    assert db.insert_data(br) == 0
+
+    pipeline = BRDataPipeline(db_path=db.db_path)
+    log = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2025-01-02", "2025-01-03"]),
+            "PTS": [10, 12],
+            "player_id": 9,
+            "player_name": "Player 9",
+        }
+    )
+    assert pipeline.insert_gamelog(log, db.conn) == 1
+    assert pipeline.insert_gamelog(log, db.conn) == 0
+    assert len(stored_rows(db)) == 3
@@ -0,0 +1,80 @@
+import os
+from io import StringIO
+
+import pandas as pd
+import requests
+
+from src import improved_nba_fetcher
+from src.improved_nba_fetcher import BasketballReferenceFetcher
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "br_gamelog.html")
+NUMERIC = ["Rk", "G", "FG%", "PTS"]
+
+
+def test_stat_tables_match_read_html():
+    with open(FIXTURE) as f:
+        html = f.read()
+
+    parsed = BasketballReferenceFetcher._read_stat_tables(html)
+    tables = pd.read_html(StringIO(html))
+    expected = [table for table in tables if "PTS" in table.columns]
+    assert len(parsed) == len(expected) == 2
+
+    for got, want in zip(parsed, expected, strict=True):
+        # read_html keeps the repeated in-body header row; the parser skips it
+        want = want[want["Rk"].astype(str) != "Rk"].reset_index(drop=True)
+        assert list(got.columns) == list(want.columns)
+        assert len(got) == len(want)
+
+        # read_html infers dtypes, the parser leaves text for the caller to coerce
+        for column in got.columns:
+            if column in NUMERIC:
+                got_col = pd.to_numeric(got[column])
+                want_col = pd.to_numeric(want[column])
+            else:
+                got_col, want_col = got[column], want[column].astype("str")
+            pd.testing.assert_series_equal(got_col, want_col, check_dtype=False)
+
+    # Empty cells come back missing, not as empty strings
+    regular = parsed[0]
+    assert regular["Unnamed: 3"].isna().tolist() == [True, False]
+    assert regular["FG%"].isna().tolist() == [False, True]
+
+
+class FixtureSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        with open(FIXTURE, "rb") as f:
+            response._content = f.read()
+        return response
+
+
+def test_gamelog_since_skips_parsing_unchanged_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(improved_nba_fetcher, "BR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(improved_nba_fetcher.br_rate_limiter, "interval", 0)
+
+    session = FixtureSession()
+    fetcher = BasketballReferenceFetcher(session=session)
+    parsed = []
+    parse = fetcher._parse_gamelog
+
+    def spy(*args):
+        parsed.append(args)
+        return parse(*args)
+
+    monkeypatch.setattr(fetcher, "_parse_gamelog", spy)
+
+    # The newest game on the page is 2025-04-19: downloaded, not parsed
+    assert fetcher.get_player_gamelog_since("jamesle01", "2025", "2025-04-19").empty
+    assert (session.calls, len(parsed)) == (1, 0)
+
+    newer = fetcher.get_player_gamelog_since("jamesle01", "2025", "2024-10-22")
+    assert (session.calls, len(parsed)) == (2, 1)
+    dates = newer["Date"].dt.strftime("%Y-%m-%d").tolist()
+    assert dates == ["2024-10-25", "2025-04-19"]
+    assert newer["PTS"].tolist() == [21, 19]
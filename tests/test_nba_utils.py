@@ -0,0 +1,12 @@
+import numpy as np
+
+from src.nba_utils import TEAM_ABBR_MAP, map_team_abbr
+
+
+def test_map_team_abbr_matches_dict_lookup():
+    team_ids = [1610612762, 1610612741, 1610612737, 1610612764, 5, 9999999999]
+    expected = [TEAM_ABBR_MAP.get(team_id, "UNK") for team_id in team_ids]
+
+    assert map_team_abbr(team_ids).tolist() == expected
+    assert expected[:2] == ["UTA", "CHI"]
+    assert map_team_abbr(np.array([], dtype=np.int64)).tolist() == []
@@ -0,0 +1,106 @@
+import pandas as pd
+
+from src.player_insights import (
+    calculate_player_insights,
+    calculate_prop_hit_rates,
+    calculate_prop_summary,
+    generate_prop_summary_table,
+)
+
+
+def test_player_insights_recent_vs_season():
+    df = pd.DataFrame(
+        {
+            "player_id": [1, 2, 1, 1, 2],
+            "player_name": ["A", "B", "A", "A", "B"],
+            # Out of order on purpose: recent games are picked by date
+            "game_date": [
+                "2024-01-03",
+                "2024-01-01",
+                "2024-01-01",
+                "2024-01-02",
+                "2024-01-02",
+            ],
+            "pts": [30, 10, 10, 20, 20],
+            "reb": [3, 1, 1, 2, 2],
+            "ast": [6, 4, 2, 4, 8],
+        }
+    )
+    insights = calculate_player_insights(df, game_limit=2).set_index("player_id")
+
+    a = insights.loc[1]
+    assert a["player_name"] == "A"
+    assert a["games_played"] == 3
+    assert a["avg_pts_recent"] == 25.0
+    assert a["avg_pts_season"] == 20.0
+    assert a["pts_delta_pct"] == 25.0
+
+    b = insights.loc[2]
+    assert b["games_played"] == 2
+    assert b["avg_ast_recent"] == b["avg_ast_season"] == 6.0
+    assert b["ast_delta_pct"] == 0.0
+
+
+def test_prop_hit_rates_by_window():
+    df = pd.DataFrame(
+        {
+            "player_id": [7, 7, 7],
+            "player_name": ["C", "C", "C"],
+            "game_date": ["2024-01-01", "2024-01-03", "2024-01-02"],
+            "pts": [20, 10, 16],
+            "reb": [7, 7, 7],
+            "ast": [0, 0, 0],
+        }
+    )
+    rates = calculate_prop_hit_rates(df, game_limits=[1, 2, 5]).iloc[0]
+
+    # Most recent game first: 10, 16, 20 against the 15.5 line
+    assert rates["pts_L1"] == "0/1 (0.0%)"
+    assert rates["pts_L2"] == "1/2 (50.0%)"
+    assert rates["pts_L5"] == "2/3 (66.7%)"
+    assert rates["reb_L5"] == "3/3 (100.0%)"
+
+
+def test_prop_summary_trend_and_estimate():
+    df = pd.DataFrame(
+        {
+            "player_id": [1] * 6 + [2] * 3,
+            "player_name": ["A"] * 6 + ["B"] * 3,
+            "game_date": [
+                *pd.date_range("2024-01-01", periods=6),
+                *pd.date_range("2024-01-01", periods=3),
+            ],
+            "pts": [10, 20, 20, 20, 20, 20, 30, 30, 30],
+        }
+    )
+    summary = generate_prop_summary_table(df, props={"pts": 15.5}, windows=[5, 10])
+
+    a, b = summary.iloc[0], summary.iloc[1]
+    assert a["L5"] == "5/5 ✅"
+    assert a["L10"] == "5/6 ✅"
+    assert a["Trend"] == "🔥"
+    assert a["Est. Over PTS 15.5"].endswith("%")
+    # Fewer than five games: no normal estimate
+    assert b["L5"] == "3/3 ✅"
+    assert b["Est. Over Chance"] == "--"
+
+
+def test_prop_summary_numeric_columns():
+    df = pd.DataFrame(
+        {
+            "player_id": [3, 3],
+            "player_name": ["D", "D"],
+            "game_date": ["2024-01-01", "2024-01-02"],
+            "pts": [10, 12],
+            "reb": [9, 2],
+        }
+    )
+    summary = calculate_prop_summary(
+        df, props={"pts": 15.5, "reb": 5.5}, windows=[1, 5], include_stats=["reb"]
+    )
+
+    assert summary["stat"].tolist() == ["pts", "reb"]
+    assert summary["L1_hits"].tolist() == [0, 0]
+    assert summary["L5_hits"].tolist() == [0, 1]
+    assert summary["trend"].tolist() == [-1, 0]
+    assert summary["over_prob"].isna().all()